@@ -0,0 +1,109 @@
+import logging
+
+from sqlalchemy import and_, text
+from sqlalchemy.orm import Session
+from app.db.models import AccountDirectory, User, Trainer, Admin
+
+logger = logging.getLogger(__name__)
+
+
+# table -> (role, principal id column)
+DIRECTORY_TABLES = {
+    "users": ("member", "user_id"),
+    "trainers": ("trainer", "trainer_id"),
+    "admins": ("admin", "admin_id"),
+}
+
+
+def normalize_email(email: str) -> str:
+    return (email or "").strip().lower()
+
+
+def resolve_account(db: Session, email: str) -> tuple[str | None, User | Trainer | Admin | None]:
+    """Return ``(role, account)`` for an email in one indexed lookup, or ``(None, None)``."""
+    row = db.query(AccountDirectory.role, User, Trainer, Admin).outerjoin(
+        User, and_(AccountDirectory.role == "member", User.user_id == AccountDirectory.principal_id)
+    ).outerjoin(
+        Trainer, and_(AccountDirectory.role == "trainer", Trainer.trainer_id == AccountDirectory.principal_id)
+    ).outerjoin(
+        Admin, and_(AccountDirectory.role == "admin", Admin.admin_id == AccountDirectory.principal_id)
+    ).filter(
+        AccountDirectory.email == normalize_email(email)
+    ).first()
+
+    if not row:
+        return None, None
+    account = row.User or row.Trainer or row.Admin
+    return (row.role, account) if account else (None, None)
+
+
+def _trigger_exists(connection, table: str) -> bool:
+    return connection.execute(text(
+        "SELECT 1 FROM pg_trigger WHERE tgrelid = to_regclass(:table) AND tgname = :name"
+    ), {"table": table, "name": f"trg_{table}_account_directory"}).first() is not None
+
+
+def _log_email_collisions(connection):
+    # Legacy rows sharing an email across roles cannot all be mirrored; the
+    # losing accounts are reported so they can be reconciled by hand.
+    parts = " UNION ALL ".join(
+        f"SELECT lower(btrim(email)) AS email, '{role}' AS role, {id_column} AS principal_id FROM {table} "
+        f"WHERE email IS NOT NULL AND {id_column} IS NOT NULL"
+        for table, (role, id_column) in DIRECTORY_TABLES.items()
+    )
+    rows = connection.execute(text(
+        f"SELECT a.email, a.role, a.principal_id FROM ({parts}) a "
+        f"JOIN account_directory d ON d.email = a.email "
+        f"WHERE d.role <> a.role OR d.principal_id <> a.principal_id "
+        f"ORDER BY a.email"
+    )).all()
+    for email, role, principal_id in rows:
+        logger.warning(
+            "account_directory: %s %s shares email %s with another account and was not indexed",
+            role, principal_id, email,
+        )
+
+
+def ensure_account_directory(connection):
+    """Install the triggers that mirror account emails into ``account_directory``.
+
+    The directory's primary key is the normalized email, so an insert or email
+    change that collides with any other role's account fails in the database.
+    The table is back-filled only when empty; members win over trainers and
+    trainers over admins if legacy rows share an email, matching login order;
+    the accounts left out are logged. Triggers are created only when missing,
+    since ``CREATE TRIGGER`` locks the account tables against writes.
+    """
+    for table, (role, id_column) in DIRECTORY_TABLES.items():
+        connection.execute(text(
+            f"CREATE OR REPLACE FUNCTION fitpro_sync_account_directory_{table}() RETURNS trigger AS $$ "
+            f"BEGIN "
+            f"IF TG_OP <> 'INSERT' THEN "
+            f"DELETE FROM account_directory WHERE role = '{role}' AND principal_id = OLD.{id_column}; "
+            f"END IF; "
+            f"IF TG_OP <> 'DELETE' THEN "
+            f"INSERT INTO account_directory (email, role, principal_id) "
+            f"VALUES (lower(btrim(NEW.email)), '{role}', NEW.{id_column}); "
+            f"END IF; "
+            f"RETURN NULL; "
+            f"END $$ LANGUAGE plpgsql"
+        ))
+        if _trigger_exists(connection, table):
+            continue
+        connection.execute(text(
+            f"CREATE TRIGGER trg_{table}_account_directory "
+            f"AFTER INSERT OR DELETE OR UPDATE OF email, {id_column} ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION fitpro_sync_account_directory_{table}()"
+        ))
+
+    if connection.execute(text("SELECT 1 FROM account_directory LIMIT 1")).first():
+        return
+
+    for table, (role, id_column) in DIRECTORY_TABLES.items():
+        connection.execute(text(
+            f"INSERT INTO account_directory (email, role, principal_id) "
+            f"SELECT lower(btrim(email)), '{role}', {id_column} FROM {table} "
+            f"WHERE email IS NOT NULL AND {id_column} IS NOT NULL "
+            f"ON CONFLICT (email) DO NOTHING"
+        ))
+    _log_email_collisions(connection)
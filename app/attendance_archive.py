@@ -0,0 +1,300 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from app.config import (
+    ATTENDANCE_ARCHIVE_DIR,
+    ATTENDANCE_ARCHIVE_HORIZON_DAYS,
+    ATTENDANCE_ARCHIVE_BATCH_SIZE,
+    ATTENDANCE_ARCHIVE_INTERVAL_HOURS,
+)
+from app.db.database import SessionLocal
+from app.db.models import Attendance
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_ROOT = Path(ATTENDANCE_ARCHIVE_DIR) / "attendances"
+# Members are spread over a fixed number of bucket directories per month so a
+# single member's history is read from one file per month. Changing this
+# strands existing files, so it is not configurable.
+ARCHIVE_USER_BUCKETS = 32
+
+
+def _archive_schema():
+    return pa.schema([
+        ("id", pa.int64()),
+        ("user_id", pa.string()),
+        ("check_in_time", pa.timestamp("us", tz="UTC")),
+        ("check_out_time", pa.timestamp("us", tz="UTC")),
+        ("verified_by_admin", pa.bool_()),
+        ("token_used", pa.string()),
+        ("auto_checkout", pa.bool_()),
+    ])
+
+
+def user_bucket(user_id) -> int:
+    return uuid.UUID(str(user_id)).int % ARCHIVE_USER_BUCKETS
+
+
+def archive_cutoff() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(days=ATTENDANCE_ARCHIVE_HORIZON_DAYS)
+
+
+def _attendance_record(attendance: Attendance) -> dict:
+    return {
+        "id": attendance.id,
+        "user_id": str(attendance.user_id),
+        "check_in_time": attendance.check_in_time,
+        "check_out_time": attendance.check_out_time,
+        "verified_by_admin": bool(attendance.verified_by_admin),
+        "token_used": str(attendance.token_used) if attendance.token_used else None,
+        "auto_checkout": bool(attendance.auto_checkout),
+    }
+
+
+def _month_dir(year: int, month: int) -> Path:
+    return ARCHIVE_ROOT / f"year={year}" / f"month={month:02d}"
+
+
+def _archived_months() -> set[tuple[int, int]]:
+    months = set()
+    for month_dir in ARCHIVE_ROOT.glob("year=*/month=*"):
+        months.add((int(month_dir.parent.name.split("=")[1]), int(month_dir.name.split("=")[1])))
+    return months
+
+
+def _write_bucket_file(year: int, month: int, bucket: int, table) -> Path:
+    bucket_dir = _month_dir(year, month) / f"bucket={bucket:02d}"
+    bucket_dir.mkdir(parents=True, exist_ok=True)
+    file_stem = f"part-{uuid.uuid4().hex}"
+    final_path = bucket_dir / f"{file_stem}.parquet"
+    # Dot-prefixed so dataset discovery skips files that are still being written.
+    temp_path = bucket_dir / f".{file_stem}.parquet.tmp"
+
+    table = table.sort_by([("user_id", "ascending"), ("check_in_time", "ascending")])
+    pq.write_table(table, temp_path, compression="zstd")
+    with open(temp_path, "rb") as handle:
+        os.fsync(handle.fileno())
+    os.replace(temp_path, final_path)
+    return final_path
+
+
+def _write_month_files(year: int, month: int, records: list[dict]) -> list[Path]:
+    buckets: dict[int, list[dict]] = {}
+    for record in records:
+        buckets.setdefault(user_bucket(record["user_id"]), []).append(record)
+    return [
+        _write_bucket_file(year, month, bucket, pa.Table.from_pylist(bucket_records, schema=_archive_schema()))
+        for bucket, bucket_records in buckets.items()
+    ]
+
+
+def _drop_duplicate_ids(table):
+    seen, keep = set(), []
+    for index, row_id in enumerate(table["id"].to_pylist()):
+        if row_id not in seen:
+            seen.add(row_id)
+            keep.append(index)
+    return table.take(pa.array(keep, type=pa.int64()))
+
+
+def compact_month(year: int, month: int) -> int:
+    """Rewrite a month as one sorted, de-duplicated file per user bucket.
+
+    Each archive batch adds small files; this folds them (and files written
+    before bucketing) together. New files are durable before the old ones are
+    removed, so a crash in between only leaves duplicates the reader drops.
+    """
+    month_dir = _month_dir(year, month)
+    old_files = sorted(path for path in month_dir.rglob("*.parquet") if not path.name.startswith("."))
+    bucket_dirs = {path.parent for path in old_files}
+    if len(old_files) <= len(bucket_dirs) and month_dir not in bucket_dirs:
+        return 0
+
+    table = _drop_duplicate_ids(
+        ds.dataset([str(path) for path in old_files], schema=_archive_schema(), format="parquet").to_table()
+    )
+    buckets = pa.array([user_bucket(value) for value in table["user_id"].to_pylist()], type=pa.int32())
+    for bucket in pc.unique(buckets).to_pylist():
+        _write_bucket_file(year, month, bucket, table.filter(pc.equal(buckets, bucket)))
+    for path in old_files:
+        path.unlink()
+    return len(old_files)
+
+
+def archive_old_attendance(batch_size: int = ATTENDANCE_ARCHIVE_BATCH_SIZE) -> dict:
+    cutoff = archive_cutoff()
+    archived_rows = 0
+    written_files = []
+    touched_months = set()
+    db = SessionLocal()
+    try:
+        while True:
+            rows = db.query(Attendance).filter(
+                Attendance.check_in_time < cutoff
+            ).order_by(
+                Attendance.check_in_time.asc(),
+                Attendance.id.asc()
+            ).limit(batch_size).all()
+
+            if not rows:
+                break
+
+            months: dict[tuple[int, int], list[dict]] = {}
+            for attendance in rows:
+                check_in_utc = attendance.check_in_time.astimezone(timezone.utc)
+                months.setdefault((check_in_utc.year, check_in_utc.month), []).append(
+                    _attendance_record(attendance)
+                )
+
+            # Files are durable before the hot rows go away; a crash in between
+            # only leaves duplicates, which the read path drops by id.
+            for (year, month), records in months.items():
+                written_files.extend(str(path) for path in _write_month_files(year, month, records))
+                touched_months.add((year, month))
+
+            db.query(Attendance).filter(
+                Attendance.check_in_time >= rows[0].check_in_time,
+                Attendance.check_in_time <= rows[-1].check_in_time,
+                Attendance.id.in_([attendance.id for attendance in rows])
+            ).delete(synchronize_session=False)
+            db.commit()
+            db.expunge_all()
+            archived_rows += len(rows)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    # Every month is checked, not just the touched ones, so files written
+    # before bucketing are folded in too; compacted months are skipped cheaply.
+    compacted_files = sum(compact_month(year, month) for year, month in sorted(touched_months | _archived_months()))
+    return {
+        "archived_rows": archived_rows,
+        "files": written_files,
+        "compacted_files": compacted_files,
+        "cutoff": cutoff,
+    }
+
+
+def _archive_files(user_id: uuid.UUID | None, start: datetime | None, end: datetime | None) -> list[Path]:
+    """Parquet files that can hold rows for this member and range.
+
+    Months and buckets are directories, so files are picked by path instead
+    of letting dataset discovery list the whole archive. Files written
+    before bucketing sit directly in the month directory and are included.
+    """
+    start_key = (start.astimezone(timezone.utc).year, start.astimezone(timezone.utc).month) if start else None
+    end_key = (end.astimezone(timezone.utc).year, end.astimezone(timezone.utc).month) if end else None
+    files = []
+    for year, month in sorted(_archived_months()):
+        if (start_key and (year, month) < start_key) or (end_key and (year, month) > end_key):
+            continue
+        month_dir = _month_dir(year, month)
+        if user_id:
+            candidates = list(month_dir.glob("*.parquet")) + list(
+                (month_dir / f"bucket={user_bucket(user_id):02d}").glob("*.parquet")
+            )
+        else:
+            candidates = list(month_dir.rglob("*.parquet"))
+        files.extend(path for path in candidates if not path.name.startswith("."))
+    return files
+
+
+def read_archived_attendance(
+    user_id: uuid.UUID | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> list[dict]:
+    if not ARCHIVE_ROOT.exists():
+        return []
+    files = _archive_files(user_id, start, end)
+    if not files:
+        return []
+
+    dataset = ds.dataset([str(path) for path in files], schema=_archive_schema(), format="parquet")
+    expression = None
+
+    def combine(condition):
+        return condition if expression is None else expression & condition
+
+    if user_id:
+        expression = combine(ds.field("user_id") == str(user_id))
+    if start:
+        start_utc = start.astimezone(timezone.utc)
+        expression = combine(ds.field("check_in_time") >= pa.scalar(start_utc, type=pa.timestamp("us", tz="UTC")))
+    if end:
+        end_utc = end.astimezone(timezone.utc)
+        expression = combine(ds.field("check_in_time") < pa.scalar(end_utc, type=pa.timestamp("us", tz="UTC")))
+
+    table = dataset.to_table(filter=expression)
+    # Drop duplicates left by a crash between writing a file and deleting rows.
+    records = {record["id"]: record for record in table.to_pylist()}
+    return sorted(records.values(), key=lambda record: (record["check_in_time"], record["id"]))
+
+
+def iter_archived_checkins(batch_size: int = ATTENDANCE_ARCHIVE_BATCH_SIZE):
+    """Yield ``(user_id, check_in_time)`` lists covering the whole archive."""
+    if not ARCHIVE_ROOT.exists():
+        return
+    dataset = ds.dataset(str(ARCHIVE_ROOT), schema=_archive_schema(), format="parquet")
+    for batch in dataset.to_batches(columns=["user_id", "check_in_time"], batch_size=batch_size):
+        yield list(zip(batch.column("user_id").to_pylist(), batch.column("check_in_time").to_pylist()))
+
+
+def oldest_archived_month() -> datetime | None:
+    months = _archived_months() if ARCHIVE_ROOT.exists() else set()
+    if not months:
+        return None
+    year, month = min(months)
+    return datetime(year, month, 1, tzinfo=timezone.utc)
+
+
+def _shift_month(month_start: datetime, months: int) -> datetime:
+    month_index = month_start.year * 12 + month_start.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def iter_archived_attendance(
+    start: datetime,
+    end: datetime,
+    user_id: uuid.UUID | None = None,
+    newest_first: bool = False,
+):
+    """Yield archived rows in ``[start, end)`` one UTC month at a time.
+
+    Months and the rows within them come oldest first, or newest first when
+    ``newest_first`` is set, so a caller can stop once it has enough rows.
+    """
+    first_month = start.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    last_month = (end.astimezone(timezone.utc) - timedelta(microseconds=1)).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0
+    )
+    month_start, step = (last_month, -1) if newest_first else (first_month, 1)
+    while first_month <= month_start <= last_month:
+        next_month = _shift_month(month_start, 1)
+        records = read_archived_attendance(user_id, max(start, month_start), min(end, next_month))
+        if records:
+            yield records[::-1] if newest_first else records
+        month_start = _shift_month(month_start, step)
+
+
+async def archive_attendance_forever():
+    while True:
+        await asyncio.sleep(max(ATTENDANCE_ARCHIVE_INTERVAL_HOURS, 1) * 3600)
+        try:
+            await asyncio.to_thread(archive_old_attendance)
+        except Exception:
+            logger.exception("Attendance archiving failed")
+
+
+if __name__ == "__main__":
+    print(archive_old_attendance())
@@ -0,0 +1,177 @@
+import argparse
+import calendar
+import uuid
+from datetime import date, timedelta
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.attendance_archive import iter_archived_checkins
+from app.db.database import engine
+from app.db.models import AttendanceBitmap
+from app.time_windows import gym_local_date
+
+
+# One bit per day of the year, day-of-year 1 at bit 0. Bit n lives in byte
+# n // 8 at position n % 8 (least significant first), which is how
+# Postgres set_bit/get_bit number bits in a bytea.
+BITMAP_BYTES = 46
+BITMAP_ENCODING = "bitmap-lsb0-base64"
+
+
+def empty_bitmap() -> bytes:
+    return bytes(BITMAP_BYTES)
+
+
+def day_is_set(bitmap: bytes, day: date) -> bool:
+    bit = day.timetuple().tm_yday - 1
+    return bool(bitmap[bit // 8] >> (bit % 8) & 1)
+
+
+def set_day(bitmap: bytearray, day: date):
+    bit = day.timetuple().tm_yday - 1
+    bitmap[bit // 8] |= 1 << (bit % 8)
+
+
+def days_in_year(year: int) -> int:
+    return 366 if calendar.isleap(year) else 365
+
+
+def attended_days(bitmap: bytes) -> int:
+    return sum(byte.bit_count() for byte in bitmap)
+
+
+def count_days_between(bitmaps: dict[int, bytes], first_day: date, last_day: date) -> int:
+    count = 0
+    day = first_day
+    while day <= last_day:
+        bitmap = bitmaps.get(day.year)
+        if bitmap and day_is_set(bitmap, day):
+            count += 1
+        day += timedelta(days=1)
+    return count
+
+
+def monthly_counts(bitmap: bytes, year: int) -> list[int]:
+    counts = []
+    for month in range(1, 13):
+        first_bit = date(year, month, 1).timetuple().tm_yday - 1
+        last_bit = first_bit + calendar.monthrange(year, month)[1]
+        counts.append(sum(bitmap[bit // 8] >> (bit % 8) & 1 for bit in range(first_bit, last_bit)))
+    return counts
+
+
+def current_streak(bitmaps: dict[int, bytes], today: date) -> int:
+    """Consecutive attended days ending today, or yesterday if today is still open."""
+    day = today
+    bitmap = bitmaps.get(day.year)
+    if not (bitmap and day_is_set(bitmap, day)):
+        day -= timedelta(days=1)
+
+    streak = 0
+    while True:
+        bitmap = bitmaps.get(day.year)
+        if not (bitmap and day_is_set(bitmap, day)):
+            return streak
+        streak += 1
+        day -= timedelta(days=1)
+
+
+def last_attended_day(bitmaps: dict[int, bytes]) -> date | None:
+    for year in sorted(bitmaps, reverse=True):
+        bitmap = bitmaps[year]
+        for bit in range(days_in_year(year) - 1, -1, -1):
+            if bitmap[bit // 8] >> (bit % 8) & 1:
+                return date(year, 1, 1) + timedelta(days=bit)
+    return None
+
+
+def longest_streak(bitmap: bytes, year: int) -> int:
+    longest = run = 0
+    for bit in range(days_in_year(year)):
+        if bitmap[bit // 8] >> (bit % 8) & 1:
+            run += 1
+            longest = max(longest, run)
+        else:
+            run = 0
+    return longest
+
+
+def load_bitmaps(db: Session, user_id) -> dict[int, bytes]:
+    rows = db.query(AttendanceBitmap.year, AttendanceBitmap.days).filter(
+        AttendanceBitmap.user_id == user_id
+    ).all()
+    return {row.year: bytes(row.days) for row in rows}
+
+
+def backfill_attendance_bitmaps(connection) -> int:
+    """Set the bit for every check-in day in ``attendances`` and the archive.
+
+    Bits are OR-ed into the stored bitmaps, so this is safe to re-run. Check-ins
+    are blocked while it runs so the trigger cannot race the rewrite. Returns
+    the number of (member, year) bitmaps written.
+    """
+    connection.execute(text("LOCK TABLE attendances IN SHARE MODE"))
+    bitmaps: dict[tuple, bytearray] = {
+        (row.user_id, row.year): bytearray(row.days)
+        for row in connection.execute(text("SELECT user_id, year, days FROM attendance_bitmaps"))
+    }
+
+    def mark(user_id, day: date):
+        set_day(bitmaps.setdefault((user_id, day.year), bytearray(BITMAP_BYTES)), day)
+
+    rows = connection.execute(text(
+        "SELECT DISTINCT user_id, check_in_date FROM attendances WHERE check_in_date IS NOT NULL"
+    ))
+    for row in rows:
+        mark(row.user_id, row.check_in_date)
+    for checkins in iter_archived_checkins():
+        for user_id, check_in_time in checkins:
+            mark(uuid.UUID(user_id), gym_local_date(check_in_time))
+
+    if bitmaps:
+        connection.execute(text(
+            "INSERT INTO attendance_bitmaps (user_id, year, days) VALUES (:user_id, :year, :days) "
+            "ON CONFLICT (user_id, year) DO UPDATE SET days = EXCLUDED.days, updated_at = now()"
+        ), [{"user_id": user_id, "year": year, "days": bytes(days)} for (user_id, year), days in bitmaps.items()])
+    return len(bitmaps)
+
+
+def ensure_attendance_bitmaps(connection):
+    """Install the check-in trigger that sets bits and back-fill on first install.
+
+    Bits are only ever set: rows archived out of ``attendances`` keep their
+    day in the member's calendar, and the back-fill reads the archive too.
+    """
+    connection.execute(text(
+        "CREATE OR REPLACE FUNCTION fitpro_mark_attendance_bitmap() RETURNS trigger AS $$ "
+        "DECLARE day_bit integer; "
+        "BEGIN "
+        "IF NEW.check_in_date IS NULL THEN RETURN NULL; END IF; "
+        "day_bit := extract(doy FROM NEW.check_in_date)::integer - 1; "
+        "INSERT INTO attendance_bitmaps (user_id, year, days) "
+        f"VALUES (NEW.user_id, extract(year FROM NEW.check_in_date)::integer, set_bit(decode(repeat('00', {BITMAP_BYTES}), 'hex'), day_bit, 1)) "
+        "ON CONFLICT (user_id, year) DO UPDATE SET days = set_bit(attendance_bitmaps.days, day_bit, 1), updated_at = now(); "
+        "RETURN NULL; "
+        "END $$ LANGUAGE plpgsql"
+    ))
+    # CREATE TRIGGER locks attendances against writes, so only run it when missing.
+    trigger_exists = connection.execute(text(
+        "SELECT 1 FROM pg_trigger WHERE tgrelid = 'attendances'::regclass AND tgname = 'trg_attendances_bitmap'"
+    )).first()
+    if not trigger_exists:
+        connection.execute(text(
+            "CREATE TRIGGER trg_attendances_bitmap AFTER INSERT OR UPDATE OF check_in_date ON attendances "
+            "FOR EACH ROW EXECUTE FUNCTION fitpro_mark_attendance_bitmap()"
+        ))
+
+    if not connection.execute(text("SELECT 1 FROM attendance_bitmaps LIMIT 1")).first():
+        backfill_attendance_bitmaps(connection)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the per-member attendance bitmaps")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser("backfill", help="Set bits for every live and archived check-in day")
+    args = parser.parse_args()
+
+    with engine.begin() as connection:
+        print(f"{backfill_attendance_bitmaps(connection)} bitmap(s) written")
@@ -14,6 +14,7 @@ CLOUDINARY_CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME")
 CLOUDINARY_API_KEY = os.getenv("CLOUDINARY_API_KEY")
 CLOUDINARY_API_SECRET = os.getenv("CLOUDINARY_API_SECRET")
 FRONTEND_APP_URL = os.getenv("FRONTEND_APP_URL") or FRONTEND_URL
+GYM_TIMEZONE = os.getenv("GYM_TIMEZONE", "UTC")
 GOOGLE_OAUTH_CLIENT_ID = os.getenv("GOOGLE_OAUTH_CLIENT_ID")
 GOOGLE_OAUTH_CLIENT_SECRET = os.getenv("GOOGLE_OAUTH_CLIENT_SECRET")
 GOOGLE_OAUTH_REDIRECT_URI = os.getenv("GOOGLE_OAUTH_REDIRECT_URI")
@@ -25,3 +26,30 @@ ADMIN_PASSWORD_CHANGE_COOLDOWN_MINUTES = int(os.getenv("ADMIN_PASSWORD_CHANGE_CO
 MEMBER_PROFILE_CHANGE_COOLDOWN_MINUTES = int(os.getenv("MEMBER_PROFILE_CHANGE_COOLDOWN_MINUTES", "10"))
 TRAINER_PROFILE_CHANGE_COOLDOWN_MINUTES = int(os.getenv("TRAINER_PROFILE_CHANGE_COOLDOWN_MINUTES", "10"))
 TRAINER_PASSWORD_CHANGE_COOLDOWN_MINUTES = int(os.getenv("TRAINER_PASSWORD_CHANGE_COOLDOWN_MINUTES", "10"))
+ATTENDANCE_PARTITION_MONTHS_AHEAD = int(os.getenv("ATTENDANCE_PARTITION_MONTHS_AHEAD", "3"))
+ATTENDANCE_PARTITION_MAINTENANCE_HOURS = int(os.getenv("ATTENDANCE_PARTITION_MAINTENANCE_HOURS", "24"))
+ATTENDANCE_ARCHIVE_DIR = os.getenv("ATTENDANCE_ARCHIVE_DIR") or str(Path(__file__).resolve().parents[1] / "archive")
+ATTENDANCE_ARCHIVE_HORIZON_DAYS = int(os.getenv("ATTENDANCE_ARCHIVE_HORIZON_DAYS", "400"))
+ATTENDANCE_ARCHIVE_BATCH_SIZE = int(os.getenv("ATTENDANCE_ARCHIVE_BATCH_SIZE", "5000"))
+ATTENDANCE_ARCHIVE_INTERVAL_HOURS = int(os.getenv("ATTENDANCE_ARCHIVE_INTERVAL_HOURS", "24"))
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+NOTIFICATION_ARCHIVE_DIR = os.getenv("NOTIFICATION_ARCHIVE_DIR") or str(Path(__file__).resolve().parents[1] / "archive")
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "180"))
+NOTIFICATION_RETENTION_MODE = os.getenv("NOTIFICATION_RETENTION_MODE", "purge")
+NOTIFICATION_RETENTION_BATCH_SIZE = int(os.getenv("NOTIFICATION_RETENTION_BATCH_SIZE", "1000"))
+NOTIFICATION_RETENTION_INTERVAL_HOURS = int(os.getenv("NOTIFICATION_RETENTION_INTERVAL_HOURS", "24"))
+LOGIN_ALERT_WINDOW_MINUTES = int(os.getenv("LOGIN_ALERT_WINDOW_MINUTES", "30"))
+NOTIFICATION_SCHEDULER_RESYNC_MINUTES = int(os.getenv("NOTIFICATION_SCHEDULER_RESYNC_MINUTES", "10"))
+DISPLAY_NAME_CACHE_SIZE = int(os.getenv("DISPLAY_NAME_CACHE_SIZE", "10000"))
+NOTIFICATION_ACK_FLUSH_SECONDS = float(os.getenv("NOTIFICATION_ACK_FLUSH_SECONDS", "2"))
+NOTIFICATION_ACK_MAX_BUFFER = int(os.getenv("NOTIFICATION_ACK_MAX_BUFFER", "500"))
+SEARCH_FUZZY_THRESHOLD = float(os.getenv("SEARCH_FUZZY_THRESHOLD", "0.3"))
+MEMBER_INDEX_MEMORY_MB = int(os.getenv("MEMBER_INDEX_MEMORY_MB", "64"))
+EXPORT_DIR = os.getenv("EXPORT_DIR") or str(Path(__file__).resolve().parents[1] / "exports")
+EXPORT_SYNC_MAX_DAYS = int(os.getenv("EXPORT_SYNC_MAX_DAYS", "92"))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+EXPORT_RETENTION_HOURS = int(os.getenv("EXPORT_RETENTION_HOURS", "24"))
+MEMBER_IMPORT_HASH_WORKERS = int(os.getenv("MEMBER_IMPORT_HASH_WORKERS", "0"))
+MEMBER_IMPORT_MAX_ROWS = int(os.getenv("MEMBER_IMPORT_MAX_ROWS", "100000"))
+MEMBER_IMPORT_DIR = os.getenv("MEMBER_IMPORT_DIR") or str(Path(__file__).resolve().parents[1] / "imports")
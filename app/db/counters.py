@@ -0,0 +1,175 @@
+import argparse
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.db.database import engine
+from app.db.models import EntityCounter
+
+
+# table -> (counter prefix, watched columns, {counter suffix: row predicate})
+COUNTED_TABLES = {
+    "users": ("members", ("is_active", "email_verified"), {
+        "total": "true",
+        "active": "{row}.is_active IS TRUE",
+        "verified": "{row}.email_verified IS TRUE",
+    }),
+    "trainers": ("trainers", ("is_active", "email_verified"), {
+        "total": "true",
+        "active": "{row}.is_active IS TRUE",
+        "verified": "{row}.email_verified IS TRUE",
+    }),
+    "admins": ("admins", ("is_active",), {
+        "total": "true",
+        "active": "{row}.is_active IS TRUE",
+    }),
+}
+
+# Per-day check-in counters used to live here. Every check-in upserted the
+# same row, serialising the morning rush on its lock, so today's count is an
+# indexed count(*) on check_in_date instead. Startup removes the old triggers.
+RETIRED_COUNTED_TABLES = ("attendances", "trainers_attendances")
+
+
+def _trigger_function_sql(table: str) -> str:
+    prefix, _, counters = COUNTED_TABLES[table]
+    declarations = "".join(f"delta_{name} bigint := 0; " for name in counters)
+    added = "".join(
+        f"IF {predicate.format(row='NEW')} THEN delta_{name} := delta_{name} + 1; END IF; "
+        for name, predicate in counters.items()
+    )
+    removed = "".join(
+        f"IF {predicate.format(row='OLD')} THEN delta_{name} := delta_{name} - 1; END IF; "
+        for name, predicate in counters.items()
+    )
+    bumps = "".join(
+        f"PERFORM fitpro_bump_counter('{prefix}_{name}', delta_{name}); "
+        for name in counters
+    )
+    return (
+        f"CREATE OR REPLACE FUNCTION fitpro_count_{table}() RETURNS trigger AS $$ "
+        f"DECLARE {declarations}"
+        f"BEGIN "
+        f"IF TG_OP <> 'DELETE' THEN {added}END IF; "
+        f"IF TG_OP <> 'INSERT' THEN {removed}END IF; "
+        f"{bumps}"
+        f"RETURN NULL; "
+        f"END $$ LANGUAGE plpgsql"
+    )
+
+
+def _trigger_exists(connection, table: str) -> bool:
+    return connection.execute(text(
+        "SELECT 1 FROM pg_trigger WHERE tgrelid = to_regclass(:table) AND tgname = :name"
+    ), {"table": table, "name": f"trg_{table}_entity_counters"}).first() is not None
+
+
+def _install_trigger(connection, table: str, columns: tuple[str, ...]):
+    # CREATE TRIGGER locks the table against writes, so it only runs when the
+    # trigger is missing; the function body is replaced on every startup.
+    if _trigger_exists(connection, table):
+        return
+    connection.execute(text(
+        f"CREATE TRIGGER trg_{table}_entity_counters "
+        f"AFTER INSERT OR DELETE OR UPDATE OF {', '.join(columns)} ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION fitpro_count_{table}()"
+    ))
+
+
+def _count_sql(table: str, predicate: str) -> str:
+    return f"SELECT count(*) FROM {table} WHERE {predicate.format(row=table)}"
+
+
+def ensure_entity_counters(connection):
+    """Install missing counter triggers and seed any counter row that is missing.
+
+    Runs inside the schema setup transaction; CREATE TRIGGER blocks writes to
+    the table until commit, so the seeded counts and the triggers line up.
+    """
+    connection.execute(text(
+        "CREATE OR REPLACE FUNCTION fitpro_bump_counter(counter_name text, delta bigint) RETURNS void AS $$ "
+        "BEGIN "
+        "IF delta <> 0 THEN "
+        "INSERT INTO entity_counters (name, value) VALUES (counter_name, delta) "
+        "ON CONFLICT (name) DO UPDATE SET value = entity_counters.value + EXCLUDED.value, updated_at = now(); "
+        "END IF; "
+        "END $$ LANGUAGE plpgsql"
+    ))
+
+    for table, (_, columns, _) in COUNTED_TABLES.items():
+        connection.execute(text(_trigger_function_sql(table)))
+        _install_trigger(connection, table, columns)
+    for table in RETIRED_COUNTED_TABLES:
+        if _trigger_exists(connection, table):
+            connection.execute(text(f"DROP TRIGGER trg_{table}_entity_counters ON {table}"))
+            connection.execute(text(f"DROP FUNCTION IF EXISTS fitpro_count_{table}()"))
+    connection.execute(text(
+        "DELETE FROM entity_counters WHERE name LIKE 'member_checkins:%' OR name LIKE 'trainer_checkins:%'"
+    ))
+
+    existing = set(connection.execute(text("SELECT name FROM entity_counters")).scalars())
+    for table, (prefix, _, counters) in COUNTED_TABLES.items():
+        for name, predicate in counters.items():
+            if f"{prefix}_{name}" not in existing:
+                connection.execute(text(
+                    "INSERT INTO entity_counters (name, value) VALUES (:name, :value) ON CONFLICT (name) DO NOTHING"
+                ), {"name": f"{prefix}_{name}", "value": connection.execute(text(_count_sql(table, predicate))).scalar()})
+
+
+def reconcile_entity_counters(connection) -> dict[str, tuple[int, int]]:
+    """Recount every counter from its table and overwrite any that drifted.
+
+    Each counted table is locked against writes while it is recounted, so
+    triggers cannot race the overwrite. Returns ``{name: (old, new)}`` for
+    the counters that changed.
+    """
+    connection.execute(text(f"LOCK TABLE {', '.join(COUNTED_TABLES)} IN SHARE MODE"))
+    current = {
+        row.name: int(row.value)
+        for row in connection.execute(text("SELECT name, value FROM entity_counters"))
+    }
+    expected: dict[str, int] = {}
+
+    for table, (prefix, _, counters) in COUNTED_TABLES.items():
+        for name, predicate in counters.items():
+            expected[f"{prefix}_{name}"] = int(connection.execute(text(_count_sql(table, predicate))).scalar())
+
+    changed = {}
+    for name, value in expected.items():
+        if current.get(name) == value:
+            continue
+        connection.execute(text(
+            "INSERT INTO entity_counters (name, value) VALUES (:name, :value) "
+            "ON CONFLICT (name) DO UPDATE SET value = EXCLUDED.value, updated_at = now()"
+        ), {"name": name, "value": value})
+        changed[name] = (current.get(name, 0), value)
+    return changed
+
+
+def read_counters(db: Session, names: list[str]) -> dict[str, int]:
+    rows = db.query(EntityCounter.name, EntityCounter.value).filter(EntityCounter.name.in_(names)).all()
+    values = {row.name: int(row.value) for row in rows}
+    return {name: values.get(name, 0) for name in names}
+
+
+def read_counter(db: Session, name: str) -> int:
+    return read_counters(db, [name])[name]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and repair the trigger-maintained entity counters")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    subcommands.add_parser("show", help="Print every counter")
+
+    subcommands.add_parser("reconcile", help="Recount the tables and fix drifted counters")
+
+    args = parser.parse_args()
+
+    with engine.begin() as connection:
+        if args.command == "show":
+            for row in connection.execute(text("SELECT name, value FROM entity_counters ORDER BY name")):
+                print(row.name, row.value)
+        else:
+            changed = reconcile_entity_counters(connection)
+            for name, (old, new) in sorted(changed.items()):
+                print(name, old, "->", new)
+            print(f"{len(changed)} counter(s) corrected")
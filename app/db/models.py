@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, text, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, LargeBinary, Boolean, text, DateTime, Date, Text, ForeignKey, Index, UniqueConstraint, Sequence
 from .database import Base
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID
@@ -7,6 +7,9 @@ from sqlalchemy.dialects.postgresql import ARRAY
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("uq_users_user_id", "user_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -36,6 +39,9 @@ class User(Base):
 
 class Trainer(Base):
     __tablename__ = "trainers"
+    __table_args__ = (
+        Index("uq_trainers_trainer_id", "trainer_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -68,6 +74,9 @@ class Trainer(Base):
 
 class Admin(Base):
     __tablename__ = "admins"
+    __table_args__ = (
+        Index("uq_admins_admin_id", "admin_id", unique=True),
+    )
     id = Column(Integer, primary_key=True, index=True)
     admin_id = Column(UUID(as_uuid=True),
                       server_default=text("gen_random_uuid()"))
@@ -106,27 +115,60 @@ class Plans(Base):
 
 class Notifications(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_segment_recipient_ids", "segment_recipient_ids", postgresql_using="gin"),
+        Index("ix_notifications_created_at", "created_at"),
+        Index(
+            "ix_notifications_pending_send_at",
+            "send_at",
+            postgresql_where=text("send_at IS NOT NULL AND dispatched_at IS NULL")
+        ),
+        Index("ix_notifications_dispatch_seq", "dispatch_seq"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     message = Column(String, nullable=False)
     recipient_id = Column(UUID(as_uuid=True))
     recipient_role = Column(String, nullable=False)
+    segment = Column(String)
+    segment_label = Column(String)
+    segment_recipient_ids = Column(ARRAY(UUID(as_uuid=True)))
+    send_at = Column(DateTime(timezone=True))
+    dispatched_at = Column(DateTime(timezone=True))
+    # Order of delivery, used as the SSE event id; scheduled rows get a new
+    # value when they are dispatched.
+    dispatch_seq = Column(BigInteger, Sequence("notifications_dispatch_seq"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
 class NotificationStatus(Base):
     __tablename__ = "notification_status"
+    __table_args__ = (
+        Index("ix_notification_status_notification_id", "notification_id"),
+        Index("ix_notification_status_recipient", "recipient_id", "recipient_role"),
+        Index(
+            "uq_notification_status_recipient",
+            "notification_id",
+            "recipient_id",
+            "recipient_role",
+            unique=True
+        ),
+    )
     id = Column(Integer, primary_key=True, index=True)
     notification_id = Column(Integer, ForeignKey("notifications.id"))
     recipient_id = Column(UUID(as_uuid=True))
     recipient_role = Column(String)
     is_read = Column(Boolean, server_default="false")
     is_deleted = Column(Boolean, server_default="false")
+    delivered_at = Column(DateTime(timezone=True))
 
 
 
 
 class QrSessions(Base):
     __tablename__ = "qr_sessions"
+    __table_args__ = (
+        Index("uq_qr_sessions_token_id", "token_id", unique=True),
+    )
     id = Column(Integer, primary_key=True, index=True)
     token_id = Column(UUID(as_uuid=True),
                       server_default=text("gen_random_uuid()"))
@@ -138,8 +180,15 @@ class QrSessions(Base):
 
 class Attendance(Base):
     __tablename__ = "attendances"
-    id = Column(Integer, primary_key=True, index=True)
-    check_in_time = Column(DateTime(timezone=True), server_default=func.now())
+    __table_args__ = (
+        Index("ix_attendances_check_in_date", "check_in_date"),
+        Index("ix_attendances_user_id_check_in_date", "user_id", "check_in_date"),
+        Index("ix_attendances_user_id_check_in_time_id", "user_id", "check_in_time", "id"),
+        {"postgresql_partition_by": "RANGE (check_in_time)"},
+    )
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    check_in_time = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
+    check_in_date = Column(Date)
     check_out_time = Column(DateTime(timezone=True))
     verified_by_admin = Column(Boolean, server_default="false")
     user_id = Column(UUID(as_uuid=True), nullable=False)
@@ -149,6 +198,10 @@ class Attendance(Base):
 
 class TrainerClient(Base):
     __tablename__ = "trainers_client"
+    __table_args__ = (
+        Index("ix_trainers_client_user_id_is_active", "user_id", "is_active"),
+        Index("ix_trainers_client_trainer_id_is_active", "trainer_id", "is_active"),
+    )
     id = Column(Integer, primary_key=True)
     trainer_id = Column(UUID(as_uuid=True), ForeignKey("trainers.trainer_id"))
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id"))
@@ -157,8 +210,14 @@ class TrainerClient(Base):
 
 class TrainersAttendance(Base):
     __tablename__ = "trainers_attendances"
-    id = Column(Integer, primary_key=True, index=True)
-    check_in_time = Column(DateTime(timezone=True), server_default=func.now())
+    __table_args__ = (
+        Index("ix_trainers_attendances_check_in_date", "check_in_date"),
+        Index("ix_trainers_attendances_trainer_id_check_in_date", "trainer_id", "check_in_date"),
+        {"postgresql_partition_by": "RANGE (check_in_time)"},
+    )
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    check_in_time = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
+    check_in_date = Column(Date)
     check_out_time = Column(DateTime(timezone=True))
     trainer_id = Column(UUID(as_uuid=True), nullable=False)
     auto_checkout = Column(Boolean, server_default="true")
@@ -212,3 +271,41 @@ class TrainerEmailVerificationToken(Base):
     expires_at = Column(DateTime(timezone=True), nullable=False)
     used = Column(Boolean, server_default="false")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class LoginAlert(Base):
+    __tablename__ = "login_alerts"
+    __table_args__ = (
+        UniqueConstraint("account_id", "role", "source", name="uq_login_alerts_account_role_source"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(UUID(as_uuid=True), nullable=False)
+    role = Column(String, nullable=False)
+    source = Column(String, nullable=False)
+    last_sent_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class EntityCounter(Base):
+    __tablename__ = "entity_counters"
+    name = Column(String, primary_key=True)
+    value = Column(BigInteger, nullable=False, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class AttendanceBitmap(Base):
+    __tablename__ = "attendance_bitmaps"
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    days = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class AccountDirectory(Base):
+    __tablename__ = "account_directory"
+    __table_args__ = (
+        Index("ix_account_directory_role_principal_id", "role", "principal_id", unique=True),
+    )
+    email = Column(String, primary_key=True)
+    role = Column(String, nullable=False)
+    principal_id = Column(UUID(as_uuid=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,215 @@
+import argparse
+import asyncio
+import logging
+import re
+from datetime import date, datetime, timezone
+from sqlalchemy import text
+from app.config import ATTENDANCE_PARTITION_MONTHS_AHEAD, ATTENDANCE_PARTITION_MAINTENANCE_HOURS
+from app.db.database import engine
+
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = ("attendances", "trainers_attendances")
+PARTITION_NAME_REGEX = re.compile(r"_p(\d{4})_(\d{2})$")
+
+
+def _month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _add_months(value: date, months: int) -> date:
+    month_index = value.year * 12 + (value.month - 1) + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _partition_name(table: str, month_start: date) -> str:
+    return f"{table}_p{month_start:%Y_%m}"
+
+
+def _default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def _table_exists(connection, name: str) -> bool:
+    return connection.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+
+
+def is_partitioned(connection, table: str) -> bool:
+    relkind = connection.execute(text(
+        "SELECT c.relkind FROM pg_class c "
+        "JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE c.relname = :table AND n.nspname = current_schema()"
+    ), {"table": table}).scalar()
+    return relkind == "p"
+
+
+def list_partitions(connection, table: str) -> list[tuple[str, date]]:
+    rows = connection.execute(text(
+        "SELECT child.relname FROM pg_inherits i "
+        "JOIN pg_class parent ON parent.oid = i.inhparent "
+        "JOIN pg_class child ON child.oid = i.inhrelid "
+        "WHERE parent.relname = :table"
+    ), {"table": table}).scalars().all()
+
+    partitions = []
+    for name in rows:
+        match = PARTITION_NAME_REGEX.search(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def create_monthly_partition(connection, table: str, month_start: date):
+    month_start = _month_start(month_start)
+    next_month = _add_months(month_start, 1)
+    name = _partition_name(table, month_start)
+    if _table_exists(connection, name):
+        return
+
+    # Bounds are pinned to UTC so they do not depend on the session TimeZone.
+    lower_bound = f"'{month_start.isoformat()} 00:00:00+00'"
+    upper_bound = f"'{next_month.isoformat()} 00:00:00+00'"
+    default_partition = _default_partition_name(table)
+    stranded = _table_exists(connection, default_partition) and connection.execute(text(
+        f"SELECT 1 FROM {default_partition} "
+        f"WHERE check_in_time >= {lower_bound} AND check_in_time < {upper_bound} LIMIT 1"
+    )).first()
+    if not stranded:
+        connection.execute(text(
+            f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM ({lower_bound}) TO ({upper_bound})"
+        ))
+        return
+
+    # Maintenance fell behind and check-ins for this month landed in the
+    # default partition; move them into the new month before attaching it.
+    logger.warning("Moving %s rows for %s out of %s", table, f"{month_start:%Y-%m}", default_partition)
+    connection.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    connection.execute(text(
+        f"WITH moved AS (DELETE FROM {default_partition} "
+        f"WHERE check_in_time >= {lower_bound} AND check_in_time < {upper_bound} RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ))
+    connection.execute(text(
+        f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ({lower_bound}) TO ({upper_bound})"
+    ))
+
+
+def ensure_default_partition(connection, table: str):
+    """Catch check-ins for months without a partition instead of rejecting them."""
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {_default_partition_name(table)} PARTITION OF {table} DEFAULT"
+    ))
+
+
+def ensure_future_partitions(connection, table: str, months_ahead: int = ATTENDANCE_PARTITION_MONTHS_AHEAD):
+    current_month = _month_start(datetime.now(timezone.utc).date())
+    for offset in range(max(months_ahead, 0) + 1):
+        create_monthly_partition(connection, table, _add_months(current_month, offset))
+
+
+def convert_to_partitioned(connection, table: str):
+    if is_partitioned(connection, table):
+        return
+
+    legacy_table = f"{table}_unpartitioned"
+    staging_table = f"{table}_partitioned"
+    sequence_name = connection.execute(
+        text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table}
+    ).scalar()
+
+    # Detach the id sequence first so dropping the legacy table keeps it alive.
+    if sequence_name:
+        connection.execute(text(f"ALTER SEQUENCE {sequence_name} OWNED BY NONE"))
+
+    connection.execute(text(
+        f"CREATE TABLE {staging_table} (LIKE {table} INCLUDING DEFAULTS) PARTITION BY RANGE (check_in_time)"
+    ))
+    connection.execute(text(f"UPDATE {table} SET check_in_time = now() WHERE check_in_time IS NULL"))
+    connection.execute(text(f"ALTER TABLE {staging_table} ALTER COLUMN check_in_time SET NOT NULL"))
+    connection.execute(text(
+        f"ALTER TABLE {staging_table} ADD CONSTRAINT {staging_table}_pkey PRIMARY KEY (id, check_in_time)"
+    ))
+
+    oldest = connection.execute(text(f"SELECT min(check_in_time) FROM {table}")).scalar()
+    current_month = _month_start(datetime.now(timezone.utc).date())
+    month_cursor = _month_start(oldest.astimezone(timezone.utc).date()) if oldest else current_month
+    while month_cursor < current_month:
+        create_monthly_partition(connection, staging_table, month_cursor)
+        month_cursor = _add_months(month_cursor, 1)
+    ensure_future_partitions(connection, staging_table)
+
+    connection.execute(text(f"INSERT INTO {staging_table} SELECT * FROM {table}"))
+    connection.execute(text(f"ALTER TABLE {table} RENAME TO {legacy_table}"))
+    connection.execute(text(f"DROP TABLE {legacy_table}"))
+    connection.execute(text(f"ALTER TABLE {staging_table} RENAME TO {table}"))
+    connection.execute(text(f"ALTER TABLE {table} RENAME CONSTRAINT {staging_table}_pkey TO {table}_pkey"))
+
+    for name, month_start in list_partitions(connection, table):
+        expected_name = _partition_name(table, month_start)
+        if name != expected_name:
+            connection.execute(text(f"ALTER TABLE {name} RENAME TO {expected_name}"))
+
+    if sequence_name:
+        connection.execute(text(f"ALTER SEQUENCE {sequence_name} OWNED BY {table}.id"))
+    connection.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_id ON {table} (id)"))
+
+
+def ensure_attendance_partitioning(connection):
+    for table in PARTITIONED_TABLES:
+        convert_to_partitioned(connection, table)
+        ensure_default_partition(connection, table)
+        ensure_future_partitions(connection, table)
+
+
+def detach_partitions_before(connection, table: str, before: date, drop: bool = False) -> list[str]:
+    cutoff = _month_start(before)
+    detached = []
+    for name, month_start in list_partitions(connection, table):
+        if _add_months(month_start, 1) > cutoff:
+            continue
+        connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        if drop:
+            connection.execute(text(f"DROP TABLE {name}"))
+        detached.append(name)
+    return detached
+
+
+def run_partition_maintenance():
+    for table in PARTITIONED_TABLES:
+        try:
+            with engine.begin() as connection:
+                ensure_default_partition(connection, table)
+                ensure_future_partitions(connection, table)
+        except Exception:
+            logger.exception("Partition maintenance failed for %s", table)
+
+
+async def maintain_partitions_forever():
+    while True:
+        await asyncio.sleep(max(ATTENDANCE_PARTITION_MAINTENANCE_HOURS, 1) * 3600)
+        await asyncio.to_thread(run_partition_maintenance)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage monthly attendance partitions")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    subcommands.add_parser("ensure", help="Create the current and upcoming monthly partitions")
+
+    detach_parser = subcommands.add_parser("detach", help="Detach partitions that end on or before a month")
+    detach_parser.add_argument("--before", required=True, help="First month to keep, as YYYY-MM")
+    detach_parser.add_argument("--table", choices=PARTITIONED_TABLES, action="append")
+    detach_parser.add_argument("--drop", action="store_true", help="Drop detached partitions instead of keeping them")
+
+    args = parser.parse_args()
+
+    with engine.begin() as connection:
+        if args.command == "ensure":
+            ensure_attendance_partitioning(connection)
+            for table in PARTITIONED_TABLES:
+                print(table, [name for name, _ in list_partitions(connection, table)])
+        else:
+            keep_from = datetime.strptime(args.before, "%Y-%m").date()
+            for table in args.table or PARTITIONED_TABLES:
+                print(table, detach_partitions_before(connection, table, keep_from, drop=args.drop))
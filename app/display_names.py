@@ -0,0 +1,72 @@
+import threading
+import uuid
+from collections import OrderedDict
+from sqlalchemy.orm import Session
+from app.config import DISPLAY_NAME_CACHE_SIZE
+from app.db.models import User, Trainer
+
+
+class DisplayNameCache:
+    """Bounded LRU of (role, principal id) -> display name, shared by all routers."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, uuid.UUID], str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, role: str, principal_ids) -> tuple[dict[uuid.UUID, str], set[uuid.UUID]]:
+        found = {}
+        missing = set()
+        with self._lock:
+            for principal_id in principal_ids:
+                key = (role, principal_id)
+                name = self._entries.get(key)
+                if name is None:
+                    missing.add(principal_id)
+                    continue
+                self._entries.move_to_end(key)
+                found[principal_id] = name
+        return found, missing
+
+    def put_many(self, role: str, names: dict[uuid.UUID, str]):
+        with self._lock:
+            for principal_id, name in names.items():
+                self._entries[(role, principal_id)] = name
+                self._entries.move_to_end((role, principal_id))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, role: str, principal_id):
+        with self._lock:
+            self._entries.pop((role, principal_id), None)
+
+
+display_name_cache = DisplayNameCache(DISPLAY_NAME_CACHE_SIZE)
+
+_NAME_SOURCES = {
+    "member": (User.user_id, User.name),
+    "trainer": (Trainer.trainer_id, Trainer.name),
+}
+
+
+def resolve_display_names(db: Session, role: str, principal_ids) -> dict[uuid.UUID, str]:
+    """Names for the given member or trainer ids; unknown ids are left out.
+
+    Cache misses are loaded with one IN query and cached. Missing rows are not
+    cached, so callers keep rendering their own "deleted" placeholder.
+    """
+    principal_ids = {principal_id for principal_id in principal_ids if principal_id}
+    if not principal_ids:
+        return {}
+
+    names, missing = display_name_cache.get_many(role, principal_ids)
+    if missing:
+        id_column, name_column = _NAME_SOURCES[role]
+        loaded = {row[0]: row[1] for row in db.query(id_column, name_column).filter(id_column.in_(missing)).all()}
+        display_name_cache.put_many(role, loaded)
+        names.update(loaded)
+    return names
+
+
+def invalidate_display_name(role: str, principal_id):
+    display_name_cache.invalidate(role, principal_id)
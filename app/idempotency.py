@@ -0,0 +1,130 @@
+import threading
+import time
+from collections import OrderedDict
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.config import IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_MAX_KEYS
+
+
+MAX_KEY_LENGTH = 255
+REPLAY_HEADER = "Idempotent-Replayed"
+
+
+class IdempotencyStore:
+    """Bounded in-process store of finished responses keyed by Idempotency-Key.
+
+    Entries expire after ``ttl_seconds`` and the oldest are evicted once
+    ``max_keys`` is reached. A key that is still being processed is held as a
+    reservation so a concurrent retry gets a 409 instead of running twice.
+    """
+
+    def __init__(self, ttl_seconds: int, max_keys: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_keys = max_keys
+        self._entries: OrderedDict[tuple, dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _purge(self, now: float):
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry["expires_at"] > now and len(self._entries) < self.max_keys:
+                break
+            self._entries.pop(key)
+
+    def begin(self, key: tuple, fingerprint: str) -> JSONResponse | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry["expires_at"] <= now:
+                self._entries.pop(key)
+                entry = None
+
+            if entry is None:
+                self._purge(now)
+                self._entries[key] = {
+                    "fingerprint": fingerprint,
+                    "expires_at": now + self.ttl_seconds,
+                    "response": None,
+                }
+                return None
+
+        if entry["fingerprint"] != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request"
+            )
+
+        if entry["response"] is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still being processed"
+            )
+
+        status_code, body = entry["response"]
+        return JSONResponse(status_code=status_code, content=body, headers={REPLAY_HEADER: "true"})
+
+    def complete(self, key: tuple, status_code: int, body):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                entry["response"] = (status_code, body)
+
+    def release(self, key: tuple):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+idempotency_store = IdempotencyStore(IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_MAX_KEYS)
+
+
+def _principal_id(current_user) -> str:
+    for attribute in ("user_id", "trainer_id", "admin_id"):
+        value = getattr(current_user, attribute, None)
+        if value:
+            return str(value)
+    return ""
+
+
+def run_idempotent(
+    idempotency_key: str | None,
+    operation: str,
+    current_user,
+    fingerprint: str,
+    success_status: int,
+    handler,
+):
+    """Run ``handler`` once per key and replay its outcome for retries.
+
+    Successful and 4xx outcomes are replayed; 5xx and unexpected errors drop
+    the reservation so the client can retry for real.
+    """
+    if not idempotency_key:
+        return handler()
+
+    idempotency_key = idempotency_key.strip()
+    if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid Idempotency-Key header"
+        )
+
+    key = (operation, _principal_id(current_user), idempotency_key)
+    replay = idempotency_store.begin(key, fingerprint)
+    if replay is not None:
+        return replay
+
+    try:
+        result = handler()
+    except HTTPException as exc:
+        if exc.status_code < 500:
+            idempotency_store.complete(key, exc.status_code, {"detail": jsonable_encoder(exc.detail)})
+        else:
+            idempotency_store.release(key)
+        raise
+    except Exception:
+        idempotency_store.release(key)
+        raise
+
+    idempotency_store.complete(key, success_status, jsonable_encoder(result))
+    return result
@@ -1,10 +1,16 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
-from app.db import models
+from app.db import models, partitions, counters
+from app import account_directory, attendance_archive, attendance_calendar, member_import, notification_retention
+from app.notification_scheduler import notification_scheduler
+from app.notification_acks import ack_buffer
+from app.member_index import build_member_index
 from app.db.database import engine
-from app.routers import auth, users, trainers, plans, notifications, checkIn, admins
-from app.config import FRONTEND_APP_URL
+from app.routers import auth, users, trainers, plans, notifications, checkIn, admins, exports
+from app.config import FRONTEND_APP_URL, GYM_TIMEZONE
 
 
 models.Base.metadata.create_all(bind=engine)
@@ -32,8 +38,95 @@ with engine.begin() as connection:
     connection.execute(text("UPDATE trainers SET base_salary = 0 WHERE base_salary IS NULL"))
     connection.execute(text("UPDATE trainers SET bonus_per_client = 0 WHERE bonus_per_client IS NULL"))
     connection.execute(text("UPDATE trainers SET email_verified = true WHERE email_verified IS NULL"))
+    partitions.ensure_attendance_partitioning(connection)
+    connection.execute(text("ALTER TABLE attendances ADD COLUMN IF NOT EXISTS check_in_date DATE"))
+    connection.execute(text("ALTER TABLE trainers_attendances ADD COLUMN IF NOT EXISTS check_in_date DATE"))
+    connection.execute(text("UPDATE attendances SET check_in_date = (check_in_time AT TIME ZONE :tz)::date WHERE check_in_date IS NULL"), {"tz": GYM_TIMEZONE})
+    connection.execute(text("UPDATE trainers_attendances SET check_in_date = (check_in_time AT TIME ZONE :tz)::date WHERE check_in_date IS NULL"), {"tz": GYM_TIMEZONE})
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_attendances_check_in_date ON attendances (check_in_date)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_attendances_user_id_check_in_date ON attendances (user_id, check_in_date)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_attendances_user_id_check_in_time_id ON attendances (user_id, check_in_time, id)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_trainers_attendances_check_in_date ON trainers_attendances (check_in_date)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_trainers_attendances_trainer_id_check_in_date ON trainers_attendances (trainer_id, check_in_date)"))
+    connection.execute(text("ALTER TABLE notifications ADD COLUMN IF NOT EXISTS segment VARCHAR"))
+    connection.execute(text("ALTER TABLE notifications ADD COLUMN IF NOT EXISTS segment_label VARCHAR"))
+    connection.execute(text("ALTER TABLE notifications ADD COLUMN IF NOT EXISTS segment_recipient_ids UUID[]"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_notifications_segment_recipient_ids ON notifications USING GIN (segment_recipient_ids)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_notifications_created_at ON notifications (created_at)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_notification_status_notification_id ON notification_status (notification_id)"))
+    connection.execute(text("ALTER TABLE notifications ADD COLUMN IF NOT EXISTS send_at TIMESTAMPTZ"))
+    connection.execute(text("ALTER TABLE notifications ADD COLUMN IF NOT EXISTS dispatched_at TIMESTAMPTZ"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_notifications_pending_send_at ON notifications (send_at) WHERE send_at IS NOT NULL AND dispatched_at IS NULL"))
+    connection.execute(text("ALTER TABLE notification_status ADD COLUMN IF NOT EXISTS delivered_at TIMESTAMPTZ"))
+    # Existing rows reuse their id as dispatch_seq so Last-Event-IDs clients
+    # already hold stay valid; the sequence then continues above both.
+    connection.execute(text("CREATE SEQUENCE IF NOT EXISTS notifications_dispatch_seq"))
+    connection.execute(text("ALTER TABLE notifications ADD COLUMN IF NOT EXISTS dispatch_seq BIGINT"))
+    connection.execute(text("UPDATE notifications SET dispatch_seq = id WHERE dispatch_seq IS NULL AND (send_at IS NULL OR dispatched_at IS NOT NULL)"))
+    connection.execute(text(
+        "SELECT setval('notifications_dispatch_seq', GREATEST((SELECT last_value FROM notifications_dispatch_seq), "
+        "(SELECT max(dispatch_seq) FROM notifications), (SELECT max(id) FROM notifications), 1))"
+    ))
+    connection.execute(text("ALTER TABLE notifications ALTER COLUMN dispatch_seq SET DEFAULT nextval('notifications_dispatch_seq')"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_notifications_dispatch_seq ON notifications (dispatch_seq)"))
+    # Collapse duplicate status rows (keeping the newest, with merged flags) so
+    # the unique index behind the ack upserts can be built.
+    connection.execute(text(
+        "UPDATE notification_status keep SET is_read = merged.is_read, is_deleted = merged.is_deleted "
+        "FROM (SELECT max(id) AS id, bool_or(is_read) AS is_read, bool_or(is_deleted) AS is_deleted "
+        "FROM notification_status GROUP BY notification_id, recipient_id, recipient_role HAVING count(*) > 1) merged "
+        "WHERE keep.id = merged.id"
+    ))
+    connection.execute(text(
+        "DELETE FROM notification_status duplicate USING notification_status keep "
+        "WHERE duplicate.notification_id = keep.notification_id "
+        "AND duplicate.recipient_id = keep.recipient_id "
+        "AND duplicate.recipient_role = keep.recipient_role "
+        "AND duplicate.id < keep.id"
+    ))
+    connection.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS uq_notification_status_recipient ON notification_status (notification_id, recipient_id, recipient_role)"))
+    connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_users_name_trgm ON users USING GIN (lower(name) gin_trgm_ops)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_users_email_trgm ON users USING GIN (lower(email) gin_trgm_ops)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_users_phone_trgm ON users USING GIN (phone gin_trgm_ops)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_users_name_lower_prefix ON users (lower(name) text_pattern_ops)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_users_name_user_id ON users (name, user_id)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_users_email_lower_prefix ON users (lower(email) text_pattern_ops)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_users_lower_name_created_at_user_id ON users (lower(name), created_at DESC, user_id)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_trainers_lower_name_created_at_trainer_id ON trainers (lower(name), created_at DESC, trainer_id)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_trainers_active_created_at_trainer_id ON trainers (created_at DESC, trainer_id) WHERE is_active IS TRUE"))
+    connection.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS uq_users_user_id ON users (user_id)"))
+    connection.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS uq_trainers_trainer_id ON trainers (trainer_id)"))
+    connection.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS uq_admins_admin_id ON admins (admin_id)"))
+    connection.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS uq_qr_sessions_token_id ON qr_sessions (token_id)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_trainers_client_user_id_is_active ON trainers_client (user_id, is_active)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_trainers_client_trainer_id_is_active ON trainers_client (trainer_id, is_active)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_notification_status_recipient ON notification_status (recipient_id, recipient_role)"))
+    counters.ensure_entity_counters(connection)
+    attendance_calendar.ensure_attendance_bitmaps(connection)
+    account_directory.ensure_account_directory(connection)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await asyncio.to_thread(exports.fail_interrupted_export_jobs)
+    await asyncio.to_thread(member_import.fail_interrupted_import_jobs)
+    background_jobs = [
+        asyncio.create_task(partitions.maintain_partitions_forever()),
+        asyncio.create_task(attendance_archive.archive_attendance_forever()),
+        asyncio.create_task(notification_retention.notification_retention_forever()),
+        asyncio.create_task(notification_scheduler.run_forever(notifications.deliver_notification)),
+        asyncio.create_task(ack_buffer.flush_forever()),
+        asyncio.create_task(build_member_index()),
+    ]
+    yield
+    for job in background_jobs:
+        job.cancel()
+    await asyncio.to_thread(ack_buffer.flush)
+    await asyncio.to_thread(member_import.shutdown_hash_pool)
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -51,3 +144,4 @@ app.include_router(plans.router)
 app.include_router(notifications.router)
 app.include_router(checkIn.router)
 app.include_router(admins.router)
+app.include_router(exports.router)
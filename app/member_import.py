@@ -0,0 +1,334 @@
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from passlib.context import CryptContext
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from app.config import MEMBER_IMPORT_HASH_WORKERS, MEMBER_IMPORT_MAX_ROWS, MEMBER_IMPORT_DIR
+from app.db.database import engine
+from app.member_index import member_index
+from app.schemas.user_schema import UserCreate
+
+
+# Same scheme as the auth router so imported members can sign in normally.
+import_pwd = CryptContext(schemes=["argon2"], deprecated="auto")
+
+IMPORT_COLUMNS = ("name", "email", "phone", "address", "fitness_goal", "experience_level", "password")
+HEADER_ALIASES = {"fitness_goal": "fitnessGoal", "experience_level": "experienceLevel"}
+LOOKUP_CHUNK_SIZE = 5000
+IMPORT_JOBS_DIR = Path(MEMBER_IMPORT_DIR) / "jobs"
+USERS_INSERT_COLUMNS = f"{', '.join(IMPORT_COLUMNS)}, auth_provider, password_login_enabled, email_verified"
+
+# One hashing pool per process, started on first use. Workers are spawned
+# rather than forked so they never inherit the server's threads and locks.
+_hash_pool: ProcessPoolExecutor | None = None
+_hash_pool_lock = threading.Lock()
+# Imports run one at a time; each already saturates the hashing pool.
+_import_lock = threading.Lock()
+
+
+def _hash_password(password: str) -> str:
+    return import_pwd.hash(password)
+
+
+def _hash_workers() -> int:
+    return MEMBER_IMPORT_HASH_WORKERS or os.cpu_count() or 1
+
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ProcessPoolExecutor(
+                max_workers=_hash_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _hash_pool
+
+
+def shutdown_hash_pool():
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is not None:
+            _hash_pool.shutdown(cancel_futures=True)
+            _hash_pool = None
+
+
+def _row_error(row_number: int, email: str | None, errors: list[str]) -> dict:
+    return {"row": row_number, "email": email, "errors": errors}
+
+
+def _validate_rows(reader: csv.DictReader) -> tuple[list[tuple[int, UserCreate]], list[dict], int]:
+    valid, errors = [], []
+    seen_emails = set()
+    total_rows = 0
+    for row_number, raw in enumerate(reader, start=2):
+        total_rows += 1
+        if total_rows > MEMBER_IMPORT_MAX_ROWS:
+            errors.append(_row_error(row_number, None, [f"Import is limited to {MEMBER_IMPORT_MAX_ROWS} rows"]))
+            break
+
+        fields = {}
+        for key, value in raw.items():
+            if not key:
+                continue
+            key = HEADER_ALIASES.get(key.strip(), key.strip())
+            # Passwords are taken verbatim, as /auth/register does.
+            fields[key] = (value or "") if key == "password" else (value or "").strip()
+        try:
+            member = UserCreate(**fields)
+        except ValidationError as exc:
+            errors.append(_row_error(row_number, fields.get("email") or None, [
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+            ]))
+            continue
+
+        email = member.email.strip().lower()
+        if email in seen_emails:
+            errors.append(_row_error(row_number, email, ["Duplicate email in file"]))
+            continue
+        seen_emails.add(email)
+        valid.append((row_number, member))
+    return valid, errors, total_rows
+
+
+def _taken_emails(connection, emails: list[str]) -> dict[str, str]:
+    taken = {}
+    for offset in range(0, len(emails), LOOKUP_CHUNK_SIZE):
+        chunk = emails[offset:offset + LOOKUP_CHUNK_SIZE]
+        rows = connection.execute(text(
+            "SELECT email, role FROM account_directory WHERE email = ANY(:emails)"
+        ), {"emails": chunk})
+        taken.update({email: role for email, role in rows})
+    return taken
+
+
+def _load_bulk(staged_csv: str, mark_verified: bool) -> list:
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TEMP TABLE member_import_staging (row_number integer, name text, email text, phone text, "
+            "address text, fitness_goal text, experience_level text, password text) ON COMMIT DROP"
+        ))
+        cursor = connection.connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY member_import_staging (row_number, {', '.join(IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                io.StringIO(staged_csv)
+            )
+        finally:
+            cursor.close()
+
+        return connection.execute(text(
+            f"INSERT INTO users ({USERS_INSERT_COLUMNS}) "
+            f"SELECT {', '.join(IMPORT_COLUMNS)}, 'password', true, :email_verified "
+            f"FROM member_import_staging staging "
+            f"WHERE NOT EXISTS (SELECT 1 FROM account_directory WHERE account_directory.email = staging.email) "
+            f"ORDER BY row_number "
+            f"ON CONFLICT (email) DO NOTHING "
+            f"RETURNING user_id, name, email, is_active"
+        ), {"email_verified": mark_verified}).all()
+
+
+def _load_row_by_row(staged_rows: list[list], mark_verified: bool) -> list:
+    """Insert each row under its own savepoint so a conflict only drops that row."""
+    imported = []
+    statement = text(
+        f"INSERT INTO users ({USERS_INSERT_COLUMNS}) "
+        f"SELECT :name, :email, :phone, :address, :fitness_goal, :experience_level, :password, "
+        f"'password', true, :email_verified "
+        f"WHERE NOT EXISTS (SELECT 1 FROM account_directory WHERE email = :email) "
+        f"ON CONFLICT (email) DO NOTHING "
+        f"RETURNING user_id, name, email, is_active"
+    )
+    with engine.begin() as connection:
+        for staged in staged_rows:
+            params = dict(zip(IMPORT_COLUMNS, staged[1:]), email_verified=mark_verified)
+            savepoint = connection.begin_nested()
+            try:
+                row = connection.execute(statement, params).first()
+                savepoint.commit()
+            except IntegrityError:
+                savepoint.rollback()
+                continue
+            if row:
+                imported.append(row)
+    return imported
+
+
+def import_members(csv_file, mark_verified: bool = False) -> dict:
+    """Validate, hash and load members from a CSV file object.
+
+    Uniqueness is checked against account_directory per chunk of emails,
+    passwords are hashed across a process pool, and rows are COPYed into a
+    temp table and inserted with ON CONFLICT DO NOTHING. An account created
+    concurrently under another role trips the account_directory trigger and
+    aborts the bulk insert, so the load is then retried row by row and only
+    the conflicting rows are rejected. Returns a report with one entry per failed row.
+    """
+    valid, errors, total_rows = _validate_rows(csv.DictReader(csv_file))
+    imported, pending = [], []
+    if valid:
+        with engine.connect() as connection:
+            taken = _taken_emails(connection, [member.email.strip().lower() for _, member in valid])
+        for row_number, member in valid:
+            email = member.email.strip().lower()
+            owner = taken.get(email)
+            if owner == "member":
+                errors.append(_row_error(row_number, email, ["Email already exists"]))
+            elif owner:
+                errors.append(_row_error(row_number, email, ["This email cannot be used for member registration"]))
+            else:
+                pending.append((row_number, member))
+
+    if pending:
+        # Hashing dominates the run time, so it happens before the load
+        # transaction opens rather than inside it.
+        passwords = [member.password for _, member in pending]
+        chunksize = max(len(passwords) // (_hash_workers() * 4), 1)
+        hashes = list(_get_hash_pool().map(_hash_password, passwords, chunksize=chunksize))
+
+        staged_rows = [
+            [
+                row_number,
+                member.name.strip(),
+                member.email.strip().lower(),
+                member.phone.strip(),
+                member.address.strip(),
+                member.fitnessGoal.strip(),
+                member.experienceLevel.strip(),
+                password_hash,
+            ]
+            for (row_number, member), password_hash in zip(pending, hashes)
+        ]
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(staged_rows)
+
+        try:
+            imported = _load_bulk(buffer.getvalue(), mark_verified)
+        except IntegrityError:
+            imported = _load_row_by_row(staged_rows, mark_verified)
+
+        inserted_emails = {row.email for row in imported}
+        for row_number, member in pending:
+            email = member.email.strip().lower()
+            if email not in inserted_emails:
+                errors.append(_row_error(row_number, email, ["Email already exists"]))
+
+    for row in imported:
+        member_index.upsert(row.user_id, row.name, row.email, row.is_active)
+
+    errors.sort(key=lambda error: error["row"])
+    return {
+        "total_rows": total_rows,
+        "imported": len(imported),
+        "failed": len(errors),
+        "email_verified": mark_verified,
+        "errors": errors,
+    }
+
+
+def _job_path(job_id: str) -> Path:
+    return IMPORT_JOBS_DIR / f"{job_id}.json"
+
+
+def _write_job(job: dict):
+    IMPORT_JOBS_DIR.mkdir(parents=True, exist_ok=True)
+    temp_path = _job_path(job["job_id"]).with_suffix(".json.tmp")
+    temp_path.write_text(json.dumps(job, default=str))
+    os.replace(temp_path, _job_path(job["job_id"]))
+
+
+def read_import_job(job_id: str) -> dict | None:
+    try:
+        return json.loads(_job_path(uuid.UUID(job_id).hex).read_text())
+    except (ValueError, OSError):
+        return None
+
+
+def create_import_job(upload, mark_verified: bool, requested_by: str) -> dict:
+    """Spool an uploaded CSV to disk and record a pending import job for it."""
+    job = {
+        "job_id": uuid.uuid4().hex,
+        "status": "running",
+        "mark_verified": mark_verified,
+        "worker_pid": os.getpid(),
+        "requested_by": requested_by,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "finished_at": None,
+        "report": None,
+    }
+    IMPORT_JOBS_DIR.mkdir(parents=True, exist_ok=True)
+    with (IMPORT_JOBS_DIR / f"{job['job_id']}.csv").open("wb") as spooled:
+        while chunk := upload.read(1024 * 1024):
+            spooled.write(chunk)
+    _write_job(job)
+    return job
+
+
+def run_import_job(job: dict):
+    upload_path = IMPORT_JOBS_DIR / f"{job['job_id']}.csv"
+    try:
+        with _import_lock, upload_path.open(newline="", encoding="utf-8-sig") as csv_file:
+            job.update(status="completed", report=import_members(csv_file, job["mark_verified"]))
+    except UnicodeDecodeError:
+        job.update(status="failed", error="CSV must be UTF-8 encoded")
+    except Exception as exc:
+        job.update(status="failed", error=str(exc))
+    finally:
+        upload_path.unlink(missing_ok=True)
+    job["finished_at"] = datetime.now(timezone.utc).isoformat()
+    _write_job(job)
+
+
+def fail_interrupted_import_jobs():
+    """Mark jobs left "running" by a previous process as failed; called at startup."""
+    for path in IMPORT_JOBS_DIR.glob("*.json"):
+        try:
+            job = json.loads(path.read_text())
+        except (ValueError, OSError):
+            continue
+        if job.get("status") != "running":
+            continue
+        pid = job.get("worker_pid")
+        if pid and pid != os.getpid():
+            try:
+                os.kill(pid, 0)
+                continue
+            except ProcessLookupError:
+                pass
+            except PermissionError:
+                continue
+        (IMPORT_JOBS_DIR / f"{job['job_id']}.csv").unlink(missing_ok=True)
+        job.update(status="failed", error="Interrupted by a server restart",
+                   finished_at=datetime.now(timezone.utc).isoformat())
+        _write_job(job)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import members from a CSV file")
+    parser.add_argument("csv_path", help="CSV with name, email, phone, address, fitnessGoal, experienceLevel, password")
+    parser.add_argument("--verified", action="store_true", help="Mark imported emails as already verified")
+    parser.add_argument("--report", help="Write the full JSON report to this path")
+    args = parser.parse_args()
+
+    try:
+        with open(args.csv_path, newline="", encoding="utf-8-sig") as csv_file:
+            report = import_members(csv_file, mark_verified=args.verified)
+    finally:
+        shutdown_hash_pool()
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as report_file:
+            json.dump(report, report_file, indent=2)
+    print(f"{report['imported']} of {report['total_rows']} rows imported, {report['failed']} failed")
+    for error in report["errors"][:20]:
+        print(f"row {error['row']}: {error['email'] or '-'}: {'; '.join(error['errors'])}")
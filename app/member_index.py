@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import sys
+import threading
+from bisect import bisect_left, insort
+from app.config import MEMBER_INDEX_MEMORY_MB
+from app.db.database import SessionLocal
+from app.db.models import User
+
+
+logger = logging.getLogger(__name__)
+
+KEY_SEPARATOR = "\x00"
+BUILD_RETRY_SECONDS = 30
+BUILD_RETRY_MAX_SECONDS = 1800
+
+
+def _member_keys(user_id: str, name: str, email: str) -> list[str]:
+    name = " ".join((name or "").lower().split())
+    terms = {name, (email or "").lower()}
+    terms.update(name.split(" "))
+    return [f"{term}{KEY_SEPARATOR}{user_id}" for term in terms if term]
+
+
+class MemberPrefixIndex:
+    """Per-process prefix index over member names, name words and emails.
+
+    Keys live in one sorted list of ``"<term>\\0<user_id>"`` strings, so a
+    prefix lookup is a bisect plus a short forward scan. Member details are
+    kept once per member. Building stops and the index stays disabled if it
+    would exceed ``MEMBER_INDEX_MEMORY_MB``; callers then use the database.
+    """
+
+    def __init__(self, memory_budget_bytes: int):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.ready = False
+        self.building = False
+        self.estimated_bytes = 0
+        self._pending_updates: list[tuple] = []
+        self._keys: list[str] = []
+        self._members: dict[str, tuple[str, str, bool]] = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _entry_bytes(keys: list[str], member: tuple) -> int:
+        # Key strings plus their list slots, the member tuple and its dict slot.
+        return sum(sys.getsizeof(key) + 8 for key in keys) + sys.getsizeof(member) + \
+            sum(sys.getsizeof(value) for value in member) + 100
+
+    def build(self, batch_size: int = 5000) -> bool:
+        keys: list[str] = []
+        members: dict[str, tuple[str, str, bool]] = {}
+        estimated_bytes = 0
+        with self._lock:
+            self.building = True
+            self._pending_updates = []
+
+        db = SessionLocal()
+        try:
+            rows = db.query(User.user_id, User.name, User.email, User.is_active).execution_options(
+                stream_results=True
+            ).yield_per(batch_size)
+            for row in rows:
+                user_id = str(row.user_id)
+                member = (row.name, row.email, bool(row.is_active))
+                member_keys = _member_keys(user_id, row.name, row.email)
+                estimated_bytes += self._entry_bytes(member_keys, member)
+                if estimated_bytes > self.memory_budget_bytes:
+                    with self._lock:
+                        self.ready = self.building = False
+                        self._keys, self._members = [], {}
+                        self._pending_updates = []
+                    return False
+                keys.extend(member_keys)
+                members[user_id] = member
+        except Exception:
+            with self._lock:
+                self.building = False
+            raise
+        finally:
+            db.close()
+
+        keys.sort()
+        with self._lock:
+            self._keys, self._members = keys, members
+            self.estimated_bytes = estimated_bytes
+            self.ready = True
+            self.building = False
+            # Changes committed while the snapshot streamed are replayed on top.
+            pending, self._pending_updates = self._pending_updates, []
+            for update in pending:
+                if update[0] == "upsert":
+                    self.upsert(*update[1:])
+                else:
+                    self.remove(update[1])
+        return self.ready
+
+    def _remove_locked(self, user_id: str):
+        member = self._members.pop(user_id, None)
+        if not member:
+            return
+        member_keys = _member_keys(user_id, member[0], member[1])
+        self.estimated_bytes -= self._entry_bytes(member_keys, member)
+        for key in member_keys:
+            position = bisect_left(self._keys, key)
+            if position < len(self._keys) and self._keys[position] == key:
+                del self._keys[position]
+
+    def upsert(self, user_id, name: str, email: str, is_active: bool):
+        user_id = str(user_id)
+        member = (name, email, bool(is_active))
+        with self._lock:
+            if self.building:
+                self._pending_updates.append(("upsert", user_id, name, email, is_active))
+                return
+            if not self.ready:
+                return
+            self._remove_locked(user_id)
+            member_keys = _member_keys(user_id, name, email)
+            self.estimated_bytes += self._entry_bytes(member_keys, member)
+            if self.estimated_bytes > self.memory_budget_bytes:
+                # Over budget: drop the index rather than serve partial results.
+                self.ready = False
+                self._keys, self._members = [], {}
+                return
+            for key in member_keys:
+                insort(self._keys, key)
+            self._members[user_id] = member
+
+    def remove(self, user_id):
+        with self._lock:
+            if self.building:
+                self._pending_updates.append(("remove", str(user_id)))
+            elif self.ready:
+                self._remove_locked(str(user_id))
+
+    def search(self, prefix: str, limit: int) -> list[dict] | None:
+        prefix = " ".join(prefix.lower().split())
+        with self._lock:
+            if not self.ready:
+                return None
+
+            results = []
+            seen = set()
+            position = bisect_left(self._keys, prefix)
+            while position < len(self._keys) and len(results) < limit:
+                key = self._keys[position]
+                if not key.startswith(prefix):
+                    break
+                user_id = key.rsplit(KEY_SEPARATOR, 1)[1]
+                if user_id not in seen:
+                    seen.add(user_id)
+                    name, email, is_active = self._members[user_id]
+                    results.append({"user_id": user_id, "name": name, "email": email, "is_active": is_active})
+                position += 1
+            return results
+
+
+member_index = MemberPrefixIndex(MEMBER_INDEX_MEMORY_MB * 1024 * 1024)
+
+
+def index_member(user: User):
+    member_index.upsert(user.user_id, user.name, user.email, user.is_active)
+
+
+async def build_member_index():
+    # A failed build leaves autocomplete on the database, so it is retried
+    # with a doubling delay. Running over the memory budget is not retried.
+    delay = BUILD_RETRY_SECONDS
+    while True:
+        try:
+            await asyncio.to_thread(member_index.build)
+            return
+        except Exception:
+            logger.exception("Member index build failed; retrying in %s seconds", delay)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, BUILD_RETRY_MAX_SECONDS)
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import threading
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import func, or_
+from sqlalchemy.dialects.postgresql import insert
+from app.config import NOTIFICATION_ACK_FLUSH_SECONDS, NOTIFICATION_ACK_MAX_BUFFER
+from app.db.database import SessionLocal
+from app.db.models import NotificationStatus
+from app.notification_audience import addressed_recipient_pairs
+
+
+logger = logging.getLogger(__name__)
+
+ACK_EVENTS = {"delivered", "read"}
+
+
+class AckBuffer:
+    """Collects socket acks in memory and writes them as one upsert per flush.
+
+    Acks for the same (notification, recipient) coalesce in the buffer, so a
+    delivered+read pair costs a single row write.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._pending: dict[tuple[int, uuid.UUID, str], dict] = {}
+        self._lock = threading.Lock()
+        self._full = asyncio.Event()
+
+    def add(self, notification_ids: list[int], recipient_id: uuid.UUID, recipient_role: str, event: str):
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            for notification_id in notification_ids:
+                entry = self._pending.setdefault(
+                    (notification_id, recipient_id, recipient_role),
+                    {"delivered_at": now, "is_read": False}
+                )
+                if event == "read":
+                    entry["is_read"] = True
+            if len(self._pending) >= self.max_entries:
+                self._full.set()
+
+    def _take(self) -> dict:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._full.clear()
+        return pending
+
+    def _requeue(self, pending: dict):
+        with self._lock:
+            for key, entry in pending.items():
+                current = self._pending.get(key)
+                if current:
+                    current["delivered_at"] = min(current["delivered_at"], entry["delivered_at"])
+                    current["is_read"] = current["is_read"] or entry["is_read"]
+                else:
+                    self._pending[key] = entry
+
+    def flush(self) -> int:
+        pending = self._take()
+        if not pending:
+            return 0
+
+        db = SessionLocal()
+        try:
+            # Only ack notifications that were actually sent to this recipient,
+            # checked for the whole buffer in one query.
+            addressed = addressed_recipient_pairs(db, list(pending))
+            rows = [
+                {
+                    "notification_id": notification_id,
+                    "recipient_id": recipient_id,
+                    "recipient_role": recipient_role,
+                    "delivered_at": entry["delivered_at"],
+                    "is_read": entry["is_read"],
+                    "is_deleted": False,
+                }
+                for (notification_id, recipient_id, recipient_role), entry in pending.items()
+                if (notification_id, recipient_id, recipient_role) in addressed
+            ]
+            if not rows:
+                return 0
+
+            statement = insert(NotificationStatus).values(rows)
+            statement = statement.on_conflict_do_update(
+                index_elements=["notification_id", "recipient_id", "recipient_role"],
+                set_={
+                    "delivered_at": func.coalesce(NotificationStatus.delivered_at, statement.excluded.delivered_at),
+                    "is_read": or_(NotificationStatus.is_read.is_(True), statement.excluded.is_read),
+                }
+            )
+            db.execute(statement)
+            db.commit()
+            return len(rows)
+        except Exception:
+            db.rollback()
+            logger.exception("Failed to flush %d notification acks; retrying next flush", len(pending))
+            self._requeue(pending)
+            return 0
+        finally:
+            db.close()
+
+    async def flush_forever(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=max(NOTIFICATION_ACK_FLUSH_SECONDS, 0.1))
+            except asyncio.TimeoutError:
+                pass
+            await asyncio.to_thread(self.flush)
+
+
+ack_buffer = AckBuffer(NOTIFICATION_ACK_MAX_BUFFER)
+
+
+def parse_ack(message: dict) -> tuple[str, list[int]] | None:
+    if not isinstance(message, dict) or message.get("type") != "ack":
+        return None
+
+    event = message.get("event")
+    notification_ids = message.get("notification_ids")
+    if event not in ACK_EVENTS or not isinstance(notification_ids, list):
+        return None
+
+    valid_ids = [value for value in notification_ids[:NOTIFICATION_ACK_MAX_BUFFER]
+                 if isinstance(value, int) and not isinstance(value, bool) and value > 0]
+    return (event, valid_ids) if valid_ids else None
@@ -0,0 +1,98 @@
+import uuid
+from sqlalchemy import Integer, String, and_, column, or_, values
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Session
+from app.db.models import Notifications, NotificationStatus
+
+
+def recipient_notifications_query(db: Session, user_role: str, user_id: uuid.UUID):
+    """Notifications addressed to one recipient, with their status row if any."""
+    query = db.query(Notifications, NotificationStatus).outerjoin(
+        NotificationStatus,
+        and_(
+            NotificationStatus.notification_id == Notifications.id,
+            NotificationStatus.recipient_id == user_id,
+            NotificationStatus.recipient_role == user_role
+        ))
+
+    filters = [
+        and_(
+            Notifications.recipient_id == user_id,
+            Notifications.recipient_role == user_role
+        ),
+        Notifications.recipient_role == 'all',
+    ]
+
+    if user_role == 'member':
+        filters.append(Notifications.recipient_role == 'allMembers')
+        filters.append(and_(
+            Notifications.recipient_role == 'segment',
+            Notifications.segment_recipient_ids.contains([user_id])
+        ))
+    elif user_role == 'trainer':
+        filters.append(Notifications.recipient_role == 'allTrainers')
+
+    query = query.filter(or_(*filters))
+    query = query.filter(or_(
+        Notifications.send_at == None,
+        Notifications.dispatched_at != None))
+    return query.filter(or_(
+        NotificationStatus.id == None,
+        NotificationStatus.is_deleted == False))
+
+
+def addressed_recipient_pairs(
+    db: Session, pairs: list[tuple[int, uuid.UUID, str]]
+) -> set[tuple[int, uuid.UUID, str]]:
+    """Filter ``(notification_id, recipient_id, recipient_role)`` pairs in one query.
+
+    Applies the same addressing rules as ``recipient_notifications_query``,
+    row by row against a VALUES list, so checking many recipients does not
+    cost a query each.
+    """
+    if not pairs:
+        return set()
+
+    requested = values(
+        column("notification_id", Integer),
+        column("recipient_id", UUID(as_uuid=True)),
+        column("recipient_role", String),
+        name="requested",
+    ).data(list(pairs))
+
+    rows = db.query(
+        requested.c.notification_id, requested.c.recipient_id, requested.c.recipient_role
+    ).join(
+        Notifications, Notifications.id == requested.c.notification_id
+    ).outerjoin(
+        NotificationStatus,
+        and_(
+            NotificationStatus.notification_id == requested.c.notification_id,
+            NotificationStatus.recipient_id == requested.c.recipient_id,
+            NotificationStatus.recipient_role == requested.c.recipient_role
+        )
+    ).filter(
+        or_(
+            and_(
+                Notifications.recipient_id == requested.c.recipient_id,
+                Notifications.recipient_role == requested.c.recipient_role
+            ),
+            Notifications.recipient_role == 'all',
+            and_(
+                requested.c.recipient_role == 'member',
+                Notifications.recipient_role == 'allMembers'
+            ),
+            and_(
+                requested.c.recipient_role == 'member',
+                Notifications.recipient_role == 'segment',
+                Notifications.segment_recipient_ids.any(requested.c.recipient_id)
+            ),
+            and_(
+                requested.c.recipient_role == 'trainer',
+                Notifications.recipient_role == 'allTrainers'
+            ),
+        ),
+        or_(Notifications.send_at == None, Notifications.dispatched_at != None),
+        or_(NotificationStatus.id == None, NotificationStatus.is_deleted == False)
+    ).all()
+    return {(row.notification_id, row.recipient_id, row.recipient_role) for row in rows}
@@ -0,0 +1,177 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from sqlalchemy import or_
+from app.config import (
+    NOTIFICATION_ARCHIVE_DIR,
+    NOTIFICATION_RETENTION_DAYS,
+    NOTIFICATION_RETENTION_MODE,
+    NOTIFICATION_RETENTION_BATCH_SIZE,
+    NOTIFICATION_RETENTION_INTERVAL_HOURS,
+)
+from app.db.database import SessionLocal
+from app.db.models import Notifications, NotificationStatus
+
+logger = logging.getLogger(__name__)
+
+
+ARCHIVE_ROOT = Path(NOTIFICATION_ARCHIVE_DIR) / "notifications"
+RETENTION_MODES = {"purge", "archive"}
+
+
+def retention_cutoff(days: int = NOTIFICATION_RETENTION_DAYS) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+
+def _notification_record(notification: Notifications, status_rows: list[NotificationStatus]) -> dict:
+    return {
+        "id": notification.id,
+        "message": notification.message,
+        "recipient_id": str(notification.recipient_id) if notification.recipient_id else None,
+        "recipient_role": notification.recipient_role,
+        "segment": notification.segment,
+        "segment_label": notification.segment_label,
+        "segment_recipient_ids": [str(value) for value in notification.segment_recipient_ids or []],
+        "send_at": notification.send_at.isoformat() if notification.send_at else None,
+        "created_at": notification.created_at.isoformat() if notification.created_at else None,
+        "statuses": [
+            {
+                "recipient_id": str(status_row.recipient_id) if status_row.recipient_id else None,
+                "recipient_role": status_row.recipient_role,
+                "is_read": bool(status_row.is_read),
+                "is_deleted": bool(status_row.is_deleted),
+                "delivered_at": status_row.delivered_at.isoformat() if status_row.delivered_at else None,
+            }
+            for status_row in status_rows
+        ],
+    }
+
+
+def _write_archive_file(records: list[dict]) -> Path:
+    day_dir = ARCHIVE_ROOT / datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    day_dir.mkdir(parents=True, exist_ok=True)
+    file_stem = f"part-{uuid.uuid4().hex}"
+    final_path = day_dir / f"{file_stem}.ndjson.gz"
+    temp_path = day_dir / f".{file_stem}.ndjson.gz.tmp"
+
+    with gzip.open(temp_path, "wt", encoding="utf-8") as handle:
+        for record in records:
+            handle.write(json.dumps(record) + "\n")
+    with open(temp_path, "rb") as handle:
+        os.fsync(handle.fileno())
+    os.replace(temp_path, final_path)
+    return final_path
+
+
+def purge_old_notifications(
+    days: int = NOTIFICATION_RETENTION_DAYS,
+    mode: str = NOTIFICATION_RETENTION_MODE,
+    batch_size: int = NOTIFICATION_RETENTION_BATCH_SIZE,
+) -> dict:
+    if mode not in RETENTION_MODES:
+        raise ValueError(f"Retention mode must be one of: {', '.join(sorted(RETENTION_MODES))}")
+
+    cutoff = retention_cutoff(days)
+    purged_notifications = 0
+    purged_status_rows = 0
+    written_files = []
+    db = SessionLocal()
+    try:
+        while True:
+            notification_ids = [row.id for row in db.query(Notifications.id).filter(
+                Notifications.created_at < cutoff,
+                or_(Notifications.send_at.is_(None), Notifications.dispatched_at.isnot(None))
+            ).order_by(Notifications.id.asc()).limit(batch_size).all()]
+
+            if not notification_ids:
+                break
+
+            if mode == "archive":
+                status_by_notification: dict[int, list[NotificationStatus]] = {}
+                for status_row in db.query(NotificationStatus).filter(
+                        NotificationStatus.notification_id.in_(notification_ids)):
+                    status_by_notification.setdefault(status_row.notification_id, []).append(status_row)
+
+                records = [
+                    _notification_record(notification, status_by_notification.get(notification.id, []))
+                    for notification in db.query(Notifications).filter(
+                        Notifications.id.in_(notification_ids)).order_by(Notifications.id.asc())
+                ]
+                written_files.append(str(_write_archive_file(records)))
+
+            purged_status_rows += db.query(NotificationStatus).filter(
+                NotificationStatus.notification_id.in_(notification_ids)
+            ).delete(synchronize_session=False)
+            purged_notifications += db.query(Notifications).filter(
+                Notifications.id.in_(notification_ids)
+            ).delete(synchronize_session=False)
+            db.commit()
+            db.expunge_all()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    return {
+        "cutoff": cutoff,
+        "mode": mode,
+        "purged_notifications": purged_notifications,
+        "purged_status_rows": purged_status_rows,
+        "files": written_files,
+    }
+
+
+def compact_notification_status(batch_size: int = NOTIFICATION_RETENTION_BATCH_SIZE) -> int:
+    """Drop status rows that say nothing: unread, undelivered and not deleted is the default."""
+    compacted = 0
+    db = SessionLocal()
+    try:
+        while True:
+            status_ids = [row.id for row in db.query(NotificationStatus.id).filter(
+                NotificationStatus.is_read.isnot(True),
+                NotificationStatus.is_deleted.isnot(True),
+                NotificationStatus.delivered_at.is_(None)
+            ).limit(batch_size).all()]
+
+            if not status_ids:
+                break
+
+            compacted += db.query(NotificationStatus).filter(
+                NotificationStatus.id.in_(status_ids)
+            ).delete(synchronize_session=False)
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    return compacted
+
+
+def run_notification_retention() -> dict:
+    report = purge_old_notifications()
+    report["compacted_status_rows"] = compact_notification_status()
+    report["reclaimed_rows"] = (
+        report["purged_notifications"] + report["purged_status_rows"] + report["compacted_status_rows"]
+    )
+    return report
+
+
+async def notification_retention_forever():
+    while True:
+        await asyncio.sleep(max(NOTIFICATION_RETENTION_INTERVAL_HOURS, 1) * 3600)
+        try:
+            await asyncio.to_thread(run_notification_retention)
+        except Exception:
+            logger.exception("Notification retention failed")
+
+
+if __name__ == "__main__":
+    print(run_notification_retention())
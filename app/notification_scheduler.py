@@ -0,0 +1,120 @@
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime, timezone
+from sqlalchemy.sql import func
+from app.config import NOTIFICATION_SCHEDULER_RESYNC_MINUTES
+from app.db.database import SessionLocal
+from app.db.models import Notifications
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationScheduler:
+    """Delivers notifications with a future ``send_at``.
+
+    Pending items sit in a min-heap keyed by due time and the loop sleeps
+    until the earliest one, waking early only when something sooner is
+    scheduled. The table is the durable copy: pending rows are reloaded on
+    startup and on a slow resync, and ``dispatched_at`` is claimed with a
+    conditional update so each row is delivered once.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[datetime, int]] = []
+        self._scheduled: set[int] = set()
+        self._wakeup = asyncio.Event()
+
+    def schedule(self, notification_id: int, send_at: datetime):
+        if notification_id in self._scheduled:
+            return
+        self._scheduled.add(notification_id)
+        heapq.heappush(self._heap, (send_at, notification_id))
+        if self._heap[0][1] == notification_id:
+            self._wakeup.set()
+
+    def _load_pending(self) -> list[tuple[int, datetime]]:
+        db = SessionLocal()
+        try:
+            rows = db.query(Notifications.id, Notifications.send_at).filter(
+                Notifications.send_at.isnot(None),
+                Notifications.dispatched_at.is_(None)
+            ).all()
+            return [(row.id, row.send_at) for row in rows]
+        finally:
+            db.close()
+
+    def _claim(self, notification_id: int) -> Notifications | None:
+        db = SessionLocal()
+        try:
+            claimed = db.query(Notifications).filter(
+                Notifications.id == notification_id,
+                Notifications.dispatched_at.is_(None)
+            ).update({
+                Notifications.dispatched_at: func.now(),
+                # A fresh sequence value puts it after every event clients
+                # have already seen, so SSE resume replays it.
+                Notifications.dispatch_seq: func.nextval("notifications_dispatch_seq"),
+            }, synchronize_session=False)
+            db.commit()
+            if not claimed:
+                return None
+
+            notification = db.query(Notifications).filter(Notifications.id == notification_id).first()
+            if notification:
+                db.expunge(notification)
+            return notification
+        except Exception:
+            db.rollback()
+            logger.exception("Failed to claim scheduled notification %s", notification_id)
+            return None
+        finally:
+            db.close()
+
+    async def _resync(self):
+        for notification_id, send_at in await asyncio.to_thread(self._load_pending):
+            self.schedule(notification_id, send_at)
+
+    async def run_forever(self, deliver):
+        resync_seconds = max(NOTIFICATION_SCHEDULER_RESYNC_MINUTES, 1) * 60
+        try:
+            await self._resync()
+        except Exception:
+            logger.exception("Failed to load pending scheduled notifications")
+        next_resync = time.monotonic() + resync_seconds
+
+        while True:
+            self._wakeup.clear()
+            timeout = max(next_resync - time.monotonic(), 0)
+            if self._heap:
+                due_in = (self._heap[0][0] - datetime.now(timezone.utc)).total_seconds()
+                timeout = min(timeout, max(due_in, 0))
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+            now = datetime.now(timezone.utc)
+            while self._heap and self._heap[0][0] <= now:
+                _, notification_id = heapq.heappop(self._heap)
+                self._scheduled.discard(notification_id)
+                notification = await asyncio.to_thread(self._claim, notification_id)
+                if notification:
+                    try:
+                        await deliver(notification)
+                    except Exception:
+                        logger.exception(
+                            "Scheduled notification %s was claimed but could not be delivered", notification_id
+                        )
+
+            if time.monotonic() >= next_resync:
+                try:
+                    await self._resync()
+                except Exception:
+                    logger.exception("Failed to resync scheduled notifications")
+                next_resync = time.monotonic() + resync_seconds
+
+
+notification_scheduler = NotificationScheduler()
@@ -0,0 +1,68 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+
+
+def _invalid_cursor() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid pagination cursor"
+    )
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Decode a keyset cursor produced by ``encode_cursor`` into ``size`` values."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        values = None
+
+    if not isinstance(values, list) or len(values) != size:
+        raise _invalid_cursor()
+    return values
+
+
+def listing_cursor(created_at: datetime, row_id, sort_name: str | None = None) -> str:
+    values = [created_at.isoformat(), str(row_id)]
+    return encode_cursor(values if sort_name is None else [sort_name, *values])
+
+
+def listing_keyset_filter(cursor: str, created_at_column, id_column, sort_name=None):
+    """Rows after ``cursor`` in a listing ordered by [sort_name asc,] created_at desc, id asc.
+
+    The leading range condition is redundant with the OR below it, but it lets
+    Postgres start an index scan at the cursor instead of filtering from the top.
+    """
+    values = decode_cursor(cursor, 2 if sort_name is None else 3)
+    try:
+        created_at = datetime.fromisoformat(values[-2])
+        row_id = uuid.UUID(values[-1])
+    except (TypeError, ValueError):
+        raise _invalid_cursor()
+
+    after_created = and_(created_at_column <= created_at, or_(
+        created_at_column < created_at,
+        and_(created_at_column == created_at, id_column > row_id)
+    ))
+    if sort_name is None:
+        return after_created
+
+    name = values[0]
+    if not isinstance(name, str):
+        raise _invalid_cursor()
+    return and_(sort_name >= name, or_(
+        sort_name > name,
+        and_(sort_name == name, or_(
+            created_at_column < created_at,
+            and_(created_at_column == created_at, id_column > row_id)
+        ))
+    ))
@@ -24,6 +24,8 @@ from app.config import (
 from app.db.database import get_db
 from app.db.models import Admin, AdminPasswordResetToken
 from app.routers.auth import manager, pwd
+from app.account_directory import resolve_account
+from sqlalchemy.exc import IntegrityError
 from app.schemas.admin_schema import (
     AdminProfileOut,
     AdminProfileUpdate,
@@ -370,9 +372,11 @@ def create_admin_by_super_admin(
     if not PHONE_REGEX.fullmatch(phone_normalized):
         raise HTTPException(status_code=400, detail="Please enter a valid phone number.")
 
-    existing_admin = db.query(Admin).filter(Admin.email == email_normalized).first()
-    if existing_admin:
+    account_role, _ = resolve_account(db, email_normalized)
+    if account_role == "admin":
         raise HTTPException(status_code=400, detail="Admin email already exists")
+    if account_role:
+        raise HTTPException(status_code=400, detail="This email cannot be used for an admin account")
 
     hashed_password = pwd.hash(data.password)
     new_admin = Admin(
@@ -385,7 +389,11 @@ def create_admin_by_super_admin(
     )
 
     db.add(new_admin)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Admin email already exists")
     db.refresh(new_admin)
 
     return {
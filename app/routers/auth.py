@@ -4,6 +4,7 @@ import html
 import mailtrap as mt
 import secrets
 import hashlib
+import threading
 from datetime import datetime, timedelta, timezone
 from urllib import error as urllib_error, parse as urllib_parse, request as urllib_request
 
@@ -11,6 +12,8 @@ from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.responses import RedirectResponse
 from fastapi_login import LoginManager
 from passlib.context import CryptContext
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
 
@@ -21,6 +24,7 @@ from app.config import (
     GOOGLE_OAUTH_REDIRECT_URI,
     PASSWORD_RESET_TOKEN_HOURS,
     EMAIL_VERIFICATION_TOKEN_HOURS,
+    LOGIN_ALERT_WINDOW_MINUTES,
     MAILTRAP_API_KEY,
     SECRET_KEY,
     TOKEN_URL,
@@ -28,6 +32,7 @@ from app.config import (
 from app.db.database import SessionLocal, get_db
 from app.db.models import (
     Admin,
+    LoginAlert,
     Notifications,
     Trainer,
     User,
@@ -36,6 +41,9 @@ from app.db.models import (
     TrainerEmailVerificationToken,
 )
 from app.schemas.user_schema import UserCreate
+from app.display_names import invalidate_display_name
+from app.member_index import index_member
+from app.account_directory import resolve_account
 from app.email_templates import build_action_email_html, build_basic_email_html
 
 
@@ -161,7 +169,59 @@ def _send_email(recipient: str, subject: str, body: str, html_body: str | None =
 
 
 
+_recent_login_alerts: dict[tuple[str, str, str], datetime] = {}
+_recent_login_alerts_lock = threading.Lock()
+
+
+def _claim_login_alert(db: Session, account_id, role: str, source: str) -> bool:
+    """Return True if this login should alert, False inside the suppression window.
+
+    The in-memory map skips the database for rapid repeats on this worker; the
+    conditional upsert keeps the window exact across workers and restarts.
+    """
+    now = datetime.now(timezone.utc)
+    window_start = now - timedelta(minutes=LOGIN_ALERT_WINDOW_MINUTES)
+    alert_key = (str(account_id), role, source)
+
+    with _recent_login_alerts_lock:
+        last_sent = _recent_login_alerts.get(alert_key)
+        if last_sent and last_sent > window_start:
+            return False
+        if len(_recent_login_alerts) > 10000:
+            for key, sent_at in list(_recent_login_alerts.items()):
+                if sent_at <= window_start:
+                    del _recent_login_alerts[key]
+
+    try:
+        statement = insert(LoginAlert).values(
+            account_id=account_id, role=role, source=source, last_sent_at=now
+        )
+        statement = statement.on_conflict_do_update(
+            constraint="uq_login_alerts_account_role_source",
+            set_={"last_sent_at": now},
+            where=LoginAlert.last_sent_at <= window_start,
+        ).returning(LoginAlert.id)
+        # Savepoint so a failed claim cannot abort the caller's login transaction.
+        with db.begin_nested():
+            claimed = db.execute(statement).first() is not None
+            last_sent = now if claimed else db.query(LoginAlert.last_sent_at).filter(
+                LoginAlert.account_id == account_id,
+                LoginAlert.role == role,
+                LoginAlert.source == source
+            ).scalar()
+    except Exception:
+        return True
+
+    if last_sent:
+        with _recent_login_alerts_lock:
+            _recent_login_alerts[alert_key] = last_sent
+    return claimed
+
+
 def _notify_member_login(db: Session, member: User, source: str):
+    if not _claim_login_alert(db, member.user_id, "member", source):
+        return
+
     try:
         db.add(
             Notifications(
@@ -195,6 +255,9 @@ def _notify_member_login(db: Session, member: User, source: str):
 
 
 def _notify_trainer_login(db: Session, trainer: Trainer, source: str):
+    if not _claim_login_alert(db, trainer.trainer_id, "trainer", source):
+        return
+
     try:
         body_lines = [
             f"Hello {trainer.name},",
@@ -503,12 +566,13 @@ def google_oauth_callback(
         return _oauth_error_redirect(mode, "Google account email is not verified. Use a verified Google account.")
 
     # Prevent cross-role collisions on the same email.
-    if db.query(Admin).filter(Admin.email == email).first():
+    account_role, account = resolve_account(db, email)
+    if account_role == "admin":
         return _oauth_error_redirect(mode, "This email belongs to an admin account. Continue with email login.")
-    if db.query(Trainer).filter(Trainer.email == email).first():
+    if account_role == "trainer":
         return _oauth_error_redirect(mode, "This email belongs to a trainer account. Continue with email login.")
 
-    member = db.query(User).filter(User.email == email).first()
+    member = account if account_role == "member" else None
     if member:
         provider = _normalize_provider(member.auth_provider)
         if member.google_sub and member.google_sub != google_sub:
@@ -546,6 +610,8 @@ def google_oauth_callback(
         _notify_member_login(db, member, "Google")
         db.commit()
         db.refresh(member)
+        invalidate_display_name("member", member.user_id)
+        index_member(member)
 
         success_response = RedirectResponse(
             url=_build_frontend_url("/dashboard"),
@@ -570,8 +636,15 @@ def google_oauth_callback(
         email_verified=True,
     )
     db.add(new_member)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Lost a race with another sign-up for this email or Google account;
+        # the directory key or the google_sub index caught it.
+        db.rollback()
+        return _oauth_error_redirect(mode, "This email is already registered. Please sign in again.")
     db.refresh(new_member)
+    index_member(new_member)
     _notify_member_login(db, new_member, "Google")
     db.commit()
 
@@ -589,19 +662,16 @@ def google_oauth_callback(
 @router.post("/register", status_code=status.HTTP_201_CREATED)
 def register_user(data: UserCreate, response: Response, db: Session = Depends(get_db)):
     email_normalized = data.email.strip().lower()
-    existing_user = db.query(User).filter(
-        User.email == email_normalized).first()
-    if existing_user:
-        if _normalize_provider(existing_user.auth_provider) == "google" or not bool(existing_user.password_login_enabled):
+    account_role, existing_account = resolve_account(db, email_normalized)
+    if account_role == "member":
+        if _normalize_provider(existing_account.auth_provider) == "google" or not bool(existing_account.password_login_enabled):
             raise HTTPException(
                 status_code=400,
                 detail="This email is already registered with Google sign-in. Please continue with Google.",
             )
         raise HTTPException(status_code=400, detail="Email already exists")
 
-    if db.query(Admin).filter(Admin.email == email_normalized).first() or db.query(Trainer).filter(
-        Trainer.email == email_normalized
-    ).first():
+    if account_role:
         raise HTTPException(
             status_code=400, detail="This email cannot be used for member registration")
 
@@ -620,8 +690,14 @@ def register_user(data: UserCreate, response: Response, db: Session = Depends(ge
     )
 
     db.add(new_user)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Lost a race with another registration; the directory key caught it.
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Email already exists")
     db.refresh(new_user)
+    index_member(new_user)
 
     verification_sent = False
     try:
@@ -660,9 +736,10 @@ async def login(request: Request, response: Response, db: Session = Depends(get_
     password = body.get("password", "")
 
     if email and password:
-        user = db.query(User).filter(User.email == email).first()
-        trainer = db.query(Trainer).filter(Trainer.email == email).first()
-        admin = db.query(Admin).filter(Admin.email == email).first()
+        account_role, account = resolve_account(db, email)
+        user = account if account_role == "member" else None
+        trainer = account if account_role == "trainer" else None
+        admin = account if account_role == "admin" else None
 
         if not user and not trainer and not admin:
             raise HTTPException(
@@ -841,9 +918,10 @@ async def resend_verification(request: Request, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Invalid role for verification")
 
     response_message = "If an unverified account exists for this email, a verification link has been sent."
+    account_role, account = resolve_account(db, email)
 
     if role == "member" or role is None:
-        member = db.query(User).filter(User.email == email).first()
+        member = account if account_role == "member" else None
         if member:
             if member.email_verified:
                 return {"message": "Email already verified. Please log in."}
@@ -866,7 +944,7 @@ async def resend_verification(request: Request, db: Session = Depends(get_db)):
                 return {"message": response_message}
 
     if role == "trainer" or role is None:
-        trainer = db.query(Trainer).filter(Trainer.email == email).first()
+        trainer = account if account_role == "trainer" else None
         if trainer:
             if trainer.email_verified:
                 return {"message": "Email already verified. Please log in."}
@@ -1,11 +1,15 @@
 from sqlalchemy import text, func, or_
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query, WebSocket
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query, WebSocket, Header
 from sqlalchemy.orm import Session
 from app.db.database import get_db, SessionLocal
 from app.db.models import Attendance, QrSessions, Admin, User
 from app.schemas.checkin_schema import ManualCheckInRequest
 from app.routers.auth import manager
-from datetime import date, timedelta, datetime, timezone
+from app.idempotency import run_idempotent
+from app.time_windows import day_window, checkin_day_filters, gym_today, gym_local_date
+from app.db.counters import read_counter
+from app.config import GYM_TIMEZONE
+from datetime import timedelta, datetime, timezone
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 import uuid
 import asyncio
@@ -75,15 +79,15 @@ def generate_qr_token(background_tasks: BackgroundTasks, db: Session = Depends(g
 
     new_entry = QrSessions()
 
-    today_checkins = db.query(Attendance).filter(
-        func.date(Attendance.check_in_time) == func.current_date()).all()
+    today_checkins = db.query(func.count(Attendance.id)).filter(
+        *checkin_day_filters(Attendance, gym_today())).scalar() or 0
 
     try:
         db.add(new_entry)
         db.commit()
         db.refresh(new_entry)
         background_tasks.add_task(cleanup_old_tokens)
-        return {"token": new_entry.token_id, "today_checkins": len(today_checkins)}
+        return {"token": new_entry.token_id, "today_checkins": int(today_checkins)}
     except Exception:
         db.rollback()
         raise HTTPException(status_code=500, detail="Database error")
@@ -92,6 +96,7 @@ def generate_qr_token(background_tasks: BackgroundTasks, db: Session = Depends(g
 @router.post("/verifyCheckin/{scanned_token}")
 async def verify_checkin(
     scanned_token: str,
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db),
     current_user=Depends(manager)
 ):
@@ -106,57 +111,71 @@ async def verify_checkin(
             detail="Email not verified. Please verify your email to continue."
         )
 
-    try:
-        valid_uuid = uuid.UUID(scanned_token)
-    except ValueError:
-        raise HTTPException(
-            status_code=400, detail="That is not a valid QR token format")
-
-    session_record = db.query(QrSessions).filter(
-        QrSessions.token_id == valid_uuid,
-        QrSessions.is_used.is_(False),
-        QrSessions.expires_at > text("now()")
-    ).first()
+    def record_checkin():
+        try:
+            valid_uuid = uuid.UUID(scanned_token)
+        except ValueError:
+            raise HTTPException(
+                status_code=400, detail="That is not a valid QR token format")
 
-    if not session_record:
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid, expired, or already used QR code."
+        session_record = db.query(QrSessions).filter(
+            QrSessions.token_id == valid_uuid,
+            QrSessions.is_used.is_(False),
+            QrSessions.expires_at > text("now()")
+        ).first()
+
+        if not session_record:
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid, expired, or already used QR code."
+            )
+
+        already_checked_in = db.query(Attendance).filter(
+            Attendance.user_id == current_user.user_id,
+            *checkin_day_filters(Attendance, gym_today())
+        ).first()
+
+        if already_checked_in:
+            raise HTTPException(
+                status_code=400, detail="You have already checked in today!")
+
+        session_record.is_used = True
+
+        checkinTime = datetime.now(timezone.utc)
+        checkoutTime = checkinTime + timedelta(hours=6)
+        new_attendance = Attendance(
+            user_id=current_user.user_id,
+            token_used=session_record.token_id,
+            check_in_time=checkinTime,
+            check_in_date=gym_local_date(checkinTime),
+            check_out_time=checkoutTime
         )
 
-    already_checked_in = db.query(Attendance).filter(
-        Attendance.user_id == current_user.user_id,
-        func.date(Attendance.check_in_time) == func.current_date()
-    ).first()
-
-    if already_checked_in:
-        raise HTTPException(
-            status_code=400, detail="You have already checked in today!")
-
-    session_record.is_used = True
-
-    checkoutTime = datetime.now(timezone.utc) + timedelta(hours=6)
-    new_attendance = Attendance(
-        user_id=current_user.user_id,
-        token_used=session_record.token_id,
-        check_out_time=checkoutTime
+        try:
+            db.add(new_attendance)
+            db.commit()
+            db.refresh(new_attendance)
+            asyncio.create_task(ws_manager.broadcast("qr_used"))
+            return {"message": f"Welcome, {current_user.name}!"}
+        except Exception:
+            db.rollback()
+            raise HTTPException(
+                status_code=500, detail="Could not record attendance")
+
+    return run_idempotent(
+        idempotency_key,
+        "verifyCheckin",
+        current_user,
+        scanned_token,
+        status.HTTP_200_OK,
+        record_checkin
     )
 
-    try:
-        db.add(new_attendance)
-        db.commit()
-        db.refresh(new_attendance)
-        asyncio.create_task(ws_manager.broadcast("qr_used"))
-        return {"message": f"Welcome, {current_user.name}!"}
-    except Exception:
-        db.rollback()
-        raise HTTPException(
-            status_code=500, detail="Could not record attendance")
-
 
 @router.post("/manualCheckinByEmail", status_code=status.HTTP_201_CREATED)
 def manual_checkin_by_email(
     payload: ManualCheckInRequest,
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db),
     current_user: Admin = Depends(manager)
 ):
@@ -175,56 +194,69 @@ def manual_checkin_by_email(
             detail="Email not verified. Please verify your email to continue."
         )
 
-    member_email = payload.email.strip().lower()
+    def record_manual_checkin():
+        member_email = payload.email.strip().lower()
 
-    member = db.query(User).filter(User.email == member_email).first()
-    if not member:
-        raise HTTPException(status_code=404, detail="Member not found")
+        member = db.query(User).filter(User.email == member_email).first()
+        if not member:
+            raise HTTPException(status_code=404, detail="Member not found")
 
-    if not member.is_active:
-        raise HTTPException(
-            status_code=403, detail="Member account is inactive")
+        if not member.is_active:
+            raise HTTPException(
+                status_code=403, detail="Member account is inactive")
 
-    already_checked_in = db.query(Attendance).filter(
-        Attendance.user_id == member.user_id,
-        func.date(Attendance.check_in_time) == func.current_date()
-    ).first()
+        already_checked_in = db.query(Attendance).filter(
+            Attendance.user_id == member.user_id,
+            *checkin_day_filters(Attendance, gym_today())
+        ).first()
 
-    if already_checked_in:
-        raise HTTPException(
-            status_code=400, detail="This member has already checked in today"
-        )
+        if already_checked_in:
+            raise HTTPException(
+                status_code=400, detail="This member has already checked in today"
+            )
 
-    checkoutTime = datetime.now(timezone.utc) + timedelta(hours=6)
+        checkinTime = datetime.now(timezone.utc)
+        checkoutTime = checkinTime + timedelta(hours=6)
 
-    manual_attendance = Attendance(
-        user_id=member.user_id,
-        verified_by_admin=True,
-        check_out_time=checkoutTime
-    )
+        manual_attendance = Attendance(
+            user_id=member.user_id,
+            verified_by_admin=True,
+            check_in_time=checkinTime,
+            check_in_date=gym_local_date(checkinTime),
+            check_out_time=checkoutTime
+        )
 
-    try:
-        db.add(manual_attendance)
-        db.commit()
-        db.refresh(manual_attendance)
-
-        today_checkins = db.query(Attendance).filter(
-            func.date(Attendance.check_in_time) == func.current_date()
-        ).count()
-
-        return {
-            "message": f"{member.name} checked in successfully",
-            "member_user_id": str(member.user_id),
-            "member_name": member.name,
-            "member_email": member.email,
-            "member_profile_photo": getattr(member, "profile_photo", None),
-            "checked_in_at": manual_attendance.check_in_time,
-            "today_checkins": today_checkins
-        }
-    except Exception:
-        db.rollback()
-        raise HTTPException(
-            status_code=500, detail="Could not record attendance")
+        try:
+            db.add(manual_attendance)
+            db.commit()
+            db.refresh(manual_attendance)
+
+            today_checkins = db.query(func.count(Attendance.id)).filter(
+                *checkin_day_filters(Attendance, gym_today())
+            ).scalar() or 0
+
+            return {
+                "message": f"{member.name} checked in successfully",
+                "member_user_id": str(member.user_id),
+                "member_name": member.name,
+                "member_email": member.email,
+                "member_profile_photo": getattr(member, "profile_photo", None),
+                "checked_in_at": manual_attendance.check_in_time,
+                "today_checkins": int(today_checkins)
+            }
+        except Exception:
+            db.rollback()
+            raise HTTPException(
+                status_code=500, detail="Could not record attendance")
+
+    return run_idempotent(
+        idempotency_key,
+        "manualCheckinByEmail",
+        current_user,
+        payload.email.strip().lower(),
+        status.HTTP_201_CREATED,
+        record_manual_checkin
+    )
 
 
 @router.get("/todayCheckins", status_code=status.HTTP_200_OK)
@@ -247,10 +279,10 @@ def get_today_checkins(
             detail="Email not verified. Please verify your email to continue."
         )
 
-    today_checkins = db.query(Attendance).filter(
-        func.date(Attendance.check_in_time) == func.current_date()).all()
+    today_checkins = db.query(func.count(Attendance.id)).filter(
+        *checkin_day_filters(Attendance, gym_today())).scalar() or 0
 
-    return {"today_checkins": len(today_checkins)}
+    return {"today_checkins": int(today_checkins)}
 
 
 @router.get("/weeklyAttendance", status_code=status.HTTP_200_OK)
@@ -267,20 +299,26 @@ def get_weekly_attendance(
             detail="Forbidden: Account is inactive"
         )
 
-    today = date.today()
+    today = gym_today()
     start_of_week = today - timedelta(days=today.weekday())
 
+    weekly_rows = db.query(
+        Attendance.check_in_date.label("day"),
+        func.count(Attendance.id).label("count")
+    ).filter(
+        *checkin_day_filters(Attendance, start_of_week, start_of_week + timedelta(days=6))
+    ).group_by(
+        Attendance.check_in_date
+    ).all()
+    weekly_count_map = {row.day: int(row.count) for row in weekly_rows}
+
     weekly_attendance = []
     for day_offset in range(7):
         day_date = start_of_week + timedelta(days=day_offset)
-        checkins_count = db.query(func.count(Attendance.id)).filter(
-            func.date(Attendance.check_in_time) == day_date
-        ).scalar() or 0
-
         weekly_attendance.append({
             "day": day_date.strftime("%a"),
             "date": day_date.isoformat(),
-            "count": int(checkins_count)
+            "count": weekly_count_map.get(day_date, 0)
         })
 
     return {"weekly_attendance": weekly_attendance}
@@ -289,7 +327,7 @@ def get_weekly_attendance(
 @router.get("/dashboardInsights", status_code=status.HTTP_200_OK)
 def get_dashboard_insights(
     db: Session = Depends(get_db),
-    tz: str = Query("UTC", min_length=1, max_length=64),
+    tz: str | None = Query(None, min_length=1, max_length=64),
     current_user: Admin = Depends(manager)
 ):
     if not current_user or current_user.role != "admin":
@@ -301,21 +339,25 @@ def get_dashboard_insights(
             detail="Forbidden: Account is inactive"
         )
 
-    client_tz = normalize_timezone(tz)
+    client_tz = normalize_timezone(tz or GYM_TIMEZONE)
     local_today = datetime.now(ZoneInfo(client_tz)).date()
     start_of_7_day_window = local_today - timedelta(days=6)
     localized_now = func.timezone(client_tz, func.now())
     localized_check_in_time = func.timezone(client_tz, Attendance.check_in_time)
-    localized_30_day_cutoff = localized_now - text("interval '30 days'")
+    # Window bounds are concrete instants so only the last month or two of
+    # attendance partitions are scanned.
+    cutoff_30_days = datetime.now(timezone.utc) - timedelta(days=30)
+    local_today_start, local_today_end = day_window(local_today, client_tz)
+    window_7_day_start, _ = day_window(start_of_7_day_window, client_tz)
 
-    total_members = db.query(func.count(User.id)).scalar() or 0
+    total_members = read_counter(db, "members_total")
 
     hour_bucket = func.extract("hour", localized_check_in_time)
     peak_hour_rows = db.query(
         hour_bucket.label("hour"),
         func.count(Attendance.id).label("count")
     ).filter(
-        localized_check_in_time >= localized_30_day_cutoff
+        Attendance.check_in_time >= cutoff_30_days
     ).group_by(
         hour_bucket
     ).order_by(
@@ -337,7 +379,7 @@ def get_dashboard_insights(
             func.extract("epoch", Attendance.check_out_time - Attendance.check_in_time) / 60.0
         )
     ).filter(
-        localized_check_in_time >= localized_30_day_cutoff,
+        Attendance.check_in_time >= cutoff_30_days,
         Attendance.check_out_time.isnot(None),
         Attendance.check_out_time >= Attendance.check_in_time,
         or_(
@@ -351,7 +393,7 @@ def get_dashboard_insights(
     active_members_last_30_days = db.query(
         func.count(func.distinct(Attendance.user_id))
     ).filter(
-        localized_check_in_time >= localized_30_day_cutoff
+        Attendance.check_in_time >= cutoff_30_days
     ).scalar() or 0
 
     inactive_members_last_30_days = max(int(total_members) - int(active_members_last_30_days), 0)
@@ -368,13 +410,13 @@ def get_dashboard_insights(
     sessions_last_30_days = db.query(
         func.count(Attendance.id)
     ).filter(
-        localized_check_in_time >= localized_30_day_cutoff
+        Attendance.check_in_time >= cutoff_30_days
     ).scalar() or 0
 
     manual_checkins_last_30_days = db.query(
         func.count(Attendance.id)
     ).filter(
-        localized_check_in_time >= localized_30_day_cutoff,
+        Attendance.check_in_time >= cutoff_30_days,
         Attendance.verified_by_admin.is_(True)
     ).scalar() or 0
 
@@ -391,7 +433,8 @@ def get_dashboard_insights(
         today_hour_bucket.label("hour"),
         func.count(Attendance.id).label("count")
     ).filter(
-        func.date(localized_check_in_time) == local_today
+        Attendance.check_in_time >= local_today_start,
+        Attendance.check_in_time < local_today_end
     ).group_by(
         today_hour_bucket
     ).all()
@@ -414,7 +457,7 @@ def get_dashboard_insights(
             func.extract("epoch", Attendance.check_out_time - Attendance.check_in_time) / 60.0
         ).label("avg_minutes")
     ).filter(
-        func.date(localized_check_in_time) >= start_of_7_day_window,
+        Attendance.check_in_time >= window_7_day_start,
         Attendance.check_out_time.isnot(None),
         Attendance.check_out_time >= Attendance.check_in_time,
         or_(
@@ -475,7 +518,7 @@ def is_checked_in(db: Session = Depends(get_db), current_user: User = Depends(ma
 
     already_checked_in = db.query(Attendance).filter(
         Attendance.user_id == member.user_id,
-        func.date(Attendance.check_in_time) == func.current_date()).first()
+        *checkin_day_filters(Attendance, gym_today())).first()
 
     if already_checked_in:
         if already_checked_in.auto_checkout and already_checked_in.check_out_time > datetime.now(timezone.utc):
@@ -501,7 +544,8 @@ def checkout(db: Session = Depends(get_db), current_user: User = Depends(manager
 
     checkoutTime = datetime.now(timezone.utc)
     attendance = db.query(Attendance).filter(Attendance.user_id == current_user.user_id,
-                                             Attendance.auto_checkout == True, func.date(Attendance.check_in_time) == func.current_date()).first()
+                                             Attendance.auto_checkout == True,
+                                             *checkin_day_filters(Attendance, gym_today())).first()
 
     attendance.check_out_time = checkoutTime
     attendance.auto_checkout = False
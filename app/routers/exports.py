@@ -0,0 +1,348 @@
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query
+from fastapi.responses import StreamingResponse, FileResponse
+from sqlalchemy import select, case, cast, and_, func, Integer
+from app.db.database import SessionLocal
+from app.db.models import Admin, User, Trainer, Attendance, TrainersAttendance
+from app.routers.auth import manager
+from app.attendance_archive import archive_cutoff, iter_archived_attendance
+from app.time_windows import days_window, checkin_day_filters, gym_today, gym_local_date
+from app.config import GYM_TIMEZONE, EXPORT_DIR, EXPORT_SYNC_MAX_DAYS, EXPORT_BATCH_SIZE, EXPORT_RETENTION_HOURS
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+import csv
+import io
+import json
+import logging
+import os
+import uuid
+
+
+router = APIRouter(prefix='/api', tags=["EXPORTS"])
+logger = logging.getLogger(__name__)
+
+EXPORT_DATASETS = {"members", "attendance", "trainerAttendance"}
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXPORT_JOBS_DIR = Path(EXPORT_DIR) / "jobs"
+
+
+def _require_admin(current_user: Admin):
+    if not current_user or current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin role required")
+
+    if not current_user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Forbidden: Account is inactive"
+        )
+
+
+def _validate_export(dataset: str, export_format: str, start: date | None, end: date | None) -> tuple[date | None, date | None]:
+    if dataset not in EXPORT_DATASETS:
+        raise HTTPException(status_code=404, detail="Unknown export dataset")
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+
+    if dataset != "members" or start or end:
+        end = end or gym_today()
+        start = start or end - timedelta(days=EXPORT_SYNC_MAX_DAYS - 1)
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start must be on or before end")
+    return start, end
+
+
+def _duration_minutes(model):
+    return case(
+        (
+            and_(model.check_out_time.isnot(None), model.check_out_time >= model.check_in_time),
+            cast(func.floor(func.extract("epoch", model.check_out_time - model.check_in_time) / 60), Integer)
+        ),
+        else_=None
+    ).label("duration_minutes")
+
+
+def _export_query(dataset: str, start: date | None, end: date | None):
+    if dataset == "members":
+        query = select(
+            User.user_id, User.name, User.email, User.phone, User.fitness_goal, User.experience_level,
+            User.is_active, User.email_verified, User.created_at, User.last_login
+        ).order_by(User.created_at, User.user_id)
+        if start:
+            window_start, window_end = days_window(start, end, GYM_TIMEZONE)
+            query = query.where(User.created_at >= window_start, User.created_at < window_end)
+        return query
+
+    if dataset == "attendance":
+        return select(
+            Attendance.id.label("attendance_id"), Attendance.user_id,
+            User.name.label("member_name"), User.email.label("member_email"),
+            Attendance.check_in_date, Attendance.check_in_time, Attendance.check_out_time,
+            _duration_minutes(Attendance), Attendance.verified_by_admin, Attendance.auto_checkout
+        ).outerjoin(
+            User, User.user_id == Attendance.user_id
+        ).where(
+            *checkin_day_filters(Attendance, start, end)
+        ).order_by(Attendance.check_in_time, Attendance.id)
+
+    return select(
+        TrainersAttendance.id.label("attendance_id"), TrainersAttendance.trainer_id,
+        Trainer.name.label("trainer_name"), Trainer.email.label("trainer_email"),
+        TrainersAttendance.check_in_date, TrainersAttendance.check_in_time, TrainersAttendance.check_out_time,
+        _duration_minutes(TrainersAttendance), TrainersAttendance.auto_checkout
+    ).outerjoin(
+        Trainer, Trainer.trainer_id == TrainersAttendance.trainer_id
+    ).where(
+        *checkin_day_filters(TrainersAttendance, start, end)
+    ).order_by(TrainersAttendance.check_in_time, TrainersAttendance.id)
+
+
+def _export_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _archived_attendance_rows(db, start: date, end: date):
+    """Member check-ins in the range that were moved to the parquet archive.
+
+    Rows come back in the same column order as the live attendance query.
+    """
+    window_start, window_end = days_window(start, end, GYM_TIMEZONE)
+    window_end = min(window_end, archive_cutoff())
+    if window_start >= window_end:
+        return
+
+    for records in iter_archived_attendance(window_start, window_end):
+        member_ids = {uuid.UUID(record["user_id"]) for record in records}
+        members = {
+            row.user_id: row for row in db.query(User.user_id, User.name, User.email).filter(User.user_id.in_(member_ids))
+        }
+        rows = []
+        for record in records:
+            member = members.get(uuid.UUID(record["user_id"]))
+            check_in, check_out = record["check_in_time"], record["check_out_time"]
+            duration = None
+            if check_out is not None and check_out >= check_in:
+                duration = int((check_out - check_in).total_seconds() // 60)
+            rows.append((
+                record["id"], record["user_id"],
+                member.name if member else None, member.email if member else None,
+                gym_local_date(check_in), check_in, check_out,
+                duration, record["verified_by_admin"], record["auto_checkout"]
+            ))
+        yield rows
+
+
+def _export_batches(db, dataset: str, start: date | None, end: date | None):
+    archived_ids = set()
+    if dataset == "attendance":
+        for rows in _archived_attendance_rows(db, start, end):
+            archived_ids.update(row[0] for row in rows)
+            for offset in range(0, len(rows), EXPORT_BATCH_SIZE):
+                yield rows[offset:offset + EXPORT_BATCH_SIZE]
+
+    result = db.execute(_export_query(dataset, start, end).execution_options(yield_per=EXPORT_BATCH_SIZE))
+    for rows in result.partitions():
+        # A crash mid-archive can leave a row both archived and live.
+        yield [row for row in rows if row[0] not in archived_ids] if archived_ids else rows
+
+
+def stream_export(dataset: str, export_format: str, start: date | None, end: date | None):
+    """Yield the export in chunks of ``EXPORT_BATCH_SIZE`` rows.
+
+    Rows come from a server-side cursor on a session owned by the generator,
+    so memory stays flat and no request-scoped connection is held open.
+    Member attendance older than the archive horizon is read from the
+    parquet archive first, a month at a time.
+    """
+    db = SessionLocal()
+    try:
+        columns = list(_export_query(dataset, start, end).selected_columns.keys())
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == "csv":
+            writer.writerow(columns)
+
+        for rows in _export_batches(db, dataset, start, end):
+            for row in rows:
+                values = [_export_value(value) for value in row]
+                if export_format == "csv":
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(columns, values)), separators=(",", ":")) + "\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
+
+
+def _export_filename(dataset: str, export_format: str, start: date | None, end: date | None) -> str:
+    span = f"_{start.isoformat()}_{end.isoformat()}" if start else ""
+    return f"{dataset}{span}.{export_format}"
+
+
+def _job_path(job_id: str) -> Path:
+    return EXPORT_JOBS_DIR / f"{job_id}.json"
+
+
+def _write_job(job: dict):
+    EXPORT_JOBS_DIR.mkdir(parents=True, exist_ok=True)
+    temp_path = _job_path(job["job_id"]).with_suffix(".json.tmp")
+    temp_path.write_text(json.dumps(job))
+    os.replace(temp_path, _job_path(job["job_id"]))
+
+
+def _read_job(job_id: str) -> dict:
+    try:
+        job_id = uuid.UUID(job_id).hex
+        return json.loads(_job_path(job_id).read_text())
+    except (ValueError, OSError):
+        raise HTTPException(status_code=404, detail="Export job not found")
+
+
+def _job_is_live(job: dict) -> bool:
+    """Whether a "running" job still has a worker process that can finish it."""
+    pid = job.get("worker_pid")
+    if job.get("status") != "running" or not pid or pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def fail_interrupted_export_jobs():
+    """Mark jobs whose worker died mid-run as failed; called at startup."""
+    for path in EXPORT_JOBS_DIR.glob("*.json"):
+        try:
+            job = json.loads(path.read_text())
+        except (ValueError, OSError):
+            continue
+        if job.get("status") == "running" and not _job_is_live(job):
+            (EXPORT_JOBS_DIR / f"{job['job_id']}.{job['format']}.tmp").unlink(missing_ok=True)
+            job.update(status="failed", error="Interrupted by a server restart",
+                       finished_at=datetime.now(timezone.utc).isoformat())
+            _write_job(job)
+
+
+def _purge_expired_exports():
+    cutoff = datetime.now(timezone.utc).timestamp() - EXPORT_RETENTION_HOURS * 3600
+    running = set()
+    for path in EXPORT_JOBS_DIR.glob("*.json"):
+        try:
+            if json.loads(path.read_text()).get("status") == "running":
+                running.add(path.stem)
+        except (ValueError, OSError):
+            pass
+
+    for path in EXPORT_JOBS_DIR.glob("*"):
+        # Sidecars and artifacts are named <job_id>.<suffix>.
+        if path.name.split(".", 1)[0] in running:
+            continue
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            pass
+
+
+def run_export_job(job: dict):
+    artifact = EXPORT_JOBS_DIR / f"{job['job_id']}.{job['format']}"
+    temp_artifact = artifact.with_suffix(artifact.suffix + ".tmp")
+    start = date.fromisoformat(job["start"]) if job["start"] else None
+    end = date.fromisoformat(job["end"]) if job["end"] else None
+    try:
+        with temp_artifact.open("w", newline="", encoding="utf-8") as output:
+            for chunk in stream_export(job["dataset"], job["format"], start, end):
+                output.write(chunk)
+        os.replace(temp_artifact, artifact)
+        job.update(status="completed", artifact=artifact.name, size_bytes=artifact.stat().st_size)
+    except Exception as exc:
+        logger.exception("Export job %s failed", job["job_id"])
+        temp_artifact.unlink(missing_ok=True)
+        job.update(status="failed", error=str(exc))
+    job["finished_at"] = datetime.now(timezone.utc).isoformat()
+    _write_job(job)
+
+
+@router.get("/admin/exports/{dataset}", status_code=status.HTTP_200_OK)
+def export_dataset(
+    dataset: str,
+    format: str = Query("csv"),
+    start: date | None = Query(None),
+    end: date | None = Query(None),
+    current_user: Admin = Depends(manager)
+):
+    _require_admin(current_user)
+    start, end = _validate_export(dataset, format, start, end)
+
+    if start and (end - start).days + 1 > EXPORT_SYNC_MAX_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Ranges longer than {EXPORT_SYNC_MAX_DAYS} days must use POST /api/admin/exports/{dataset}/jobs"
+        )
+
+    return StreamingResponse(
+        stream_export(dataset, format, start, end),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{_export_filename(dataset, format, start, end)}"'}
+    )
+
+
+@router.post("/admin/exports/{dataset}/jobs", status_code=status.HTTP_202_ACCEPTED)
+def create_export_job(
+    dataset: str,
+    background_tasks: BackgroundTasks,
+    format: str = Query("csv"),
+    start: date | None = Query(None),
+    end: date | None = Query(None),
+    current_user: Admin = Depends(manager)
+):
+    _require_admin(current_user)
+    start, end = _validate_export(dataset, format, start, end)
+
+    job = {
+        "job_id": uuid.uuid4().hex,
+        "dataset": dataset,
+        "format": format,
+        "start": start.isoformat() if start else None,
+        "end": end.isoformat() if end else None,
+        "filename": _export_filename(dataset, format, start, end),
+        "status": "running",
+        "worker_pid": os.getpid(),
+        "requested_by": str(current_user.admin_id),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "finished_at": None,
+    }
+    _purge_expired_exports()
+    _write_job(job)
+    background_tasks.add_task(run_export_job, dict(job))
+    return job
+
+
+@router.get("/admin/exports/jobs/{job_id}", status_code=status.HTTP_200_OK)
+def get_export_job(job_id: str, current_user: Admin = Depends(manager)):
+    _require_admin(current_user)
+    return _read_job(job_id)
+
+
+@router.get("/admin/exports/jobs/{job_id}/download", status_code=status.HTTP_200_OK)
+def download_export_job(job_id: str, current_user: Admin = Depends(manager)):
+    _require_admin(current_user)
+    job = _read_job(job_id)
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Export job is {job['status']}")
+
+    artifact = EXPORT_JOBS_DIR / job["artifact"]
+    if not artifact.exists():
+        raise HTTPException(status_code=410, detail="Export artifact has expired")
+
+    return FileResponse(artifact, media_type=EXPORT_FORMATS[job["format"]], filename=job["filename"])
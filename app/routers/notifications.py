@@ -1,43 +1,154 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, desc
-from datetime import datetime, time
+from sqlalchemy import desc, exists, func
+from sqlalchemy.dialects.postgresql import insert
+from datetime import datetime, time, timedelta, timezone
+import asyncio
+import json
 import uuid
-from app.db.database import get_db
-from app.db.models import Notifications, User, Trainer, Admin, NotificationStatus
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+from app.db.database import get_db, SessionLocal
+from app.db.models import Notifications, User, Trainer, Admin, NotificationStatus, TrainerClient, Attendance
 from app.routers.auth import manager
+from app.time_windows import checkin_day_filters, gym_today
+from app.notification_retention import run_notification_retention
+from app.notification_scheduler import notification_scheduler
+from app.display_names import resolve_display_names
+from app.notification_acks import ack_buffer, parse_ack
+from app.notification_audience import recipient_notifications_query
+from app.db.counters import read_counter
 from app.schemas.notification_schema import NotificationCreate, NotificationRequest, NotificationSoftDelete
 
 router = APIRouter(prefix='/api', tags=["NOTIFICATIONS"])
 
+SEGMENTS = {'trainerClients', 'inactiveMembers', 'checkedInToday'}
+JSON_SUBPROTOCOL = "fitpro.json"
+MSGPACK_SUBPROTOCOL = "fitpro.msgpack"
+STREAM_QUEUE_SIZE = 100
+STREAM_KEEPALIVE_SECONDS = 15
+STREAM_RESUME_LIMIT = 100
+
+
+class EncodedMessage:
+    """A payload serialized at most once per encoding, shared by every recipient."""
+
+    def __init__(self, message: dict):
+        self.message = message
+        self._encoded: dict[str, str | bytes] = {}
+
+    def encode(self, encoding: str) -> str | bytes:
+        if encoding not in self._encoded:
+            if encoding == "msgpack":
+                self._encoded[encoding] = msgpack.packb(self.message)
+            else:
+                self._encoded[encoding] = json.dumps(self.message, separators=(",", ":"))
+        return self._encoded[encoding]
+
+
+def _negotiate_encoding(websocket: WebSocket) -> tuple[str, str | None]:
+    offered = [value.strip() for value in websocket.headers.get("sec-websocket-protocol", "").split(",")]
+    if MSGPACK_SUBPROTOCOL in offered and msgpack is not None:
+        return "msgpack", MSGPACK_SUBPROTOCOL
+    if JSON_SUBPROTOCOL in offered:
+        return "json", JSON_SUBPROTOCOL
+    return "json", None
+
+
+def _decode_frame(frame: dict):
+    if frame.get("bytes") is not None:
+        if msgpack is None:
+            return None
+        return msgpack.unpackb(frame["bytes"])
+    if frame.get("text") is not None:
+        return json.loads(frame["text"])
+    return None
+
 
 class ConnectionManager:
+    """Registry of live notification subscribers.
+
+    WebSockets (one per recipient) and SSE streams (one queue per open tab)
+    share the same routing, so every send reaches both transports.
+    """
+
     def __init__(self):
         self.active_connections: dict[str, dict] = {}
+        self.stream_connections: dict[str, list[dict]] = {}
 
-    async def connect(self, websocket: WebSocket, recipient_id: str, recipient_role: str):
+    async def connect(self, websocket: WebSocket, recipient_id: str, recipient_role: str, encoding: str = "json"):
         if recipient_id in self.active_connections:
             await self.active_connections[recipient_id]["ws"].close()
 
         self.active_connections[recipient_id] = {
             "ws": websocket,
-            "recipient_role": recipient_role
+            "recipient_role": recipient_role,
+            "encoding": encoding
         }
 
     def disconnect(self, recipient_id: str):
         if recipient_id in self.active_connections:
             del self.active_connections[recipient_id]
 
-    async def send_personal_message(self, message: dict, recipient_id: str):
+    def subscribe(self, recipient_id: str, recipient_role: str) -> dict:
+        connection = {
+            "queue": asyncio.Queue(maxsize=STREAM_QUEUE_SIZE),
+            "recipient_role": recipient_role,
+            "overflowed": False
+        }
+        self.stream_connections.setdefault(recipient_id, []).append(connection)
+        return connection
+
+    def unsubscribe(self, recipient_id: str, connection: dict):
+        streams = self.stream_connections.get(recipient_id, [])
+        if connection in streams:
+            streams.remove(connection)
+        if not streams:
+            self.stream_connections.pop(recipient_id, None)
+
+    def _connections(self):
+        for recipient_id, connection in list(self.active_connections.items()):
+            yield recipient_id, connection
+        for recipient_id, streams in list(self.stream_connections.items()):
+            for connection in list(streams):
+                yield recipient_id, connection
+
+    def _connections_for(self, recipient_id: str):
         connection = self.active_connections.get(recipient_id)
         if connection:
+            yield connection
+        yield from list(self.stream_connections.get(recipient_id, []))
+
+    async def _deliver(self, connection: dict, frames: EncodedMessage):
+        if "ws" in connection:
+            payload = frames.encode(connection["encoding"])
             try:
-                await connection["ws"].send_json(message)
+                if isinstance(payload, bytes):
+                    await connection["ws"].send_bytes(payload)
+                else:
+                    await connection["ws"].send_text(payload)
             except Exception:
                 pass
+            return
+
+        try:
+            connection["queue"].put_nowait(frames)
+        except asyncio.QueueFull:
+            # The stream closes and the client resumes from Last-Event-ID.
+            connection["overflowed"] = True
+
+    async def send_personal_message(self, message: dict, recipient_id: str):
+        frames = EncodedMessage(message)
+        for connection in self._connections_for(recipient_id):
+            await self._deliver(connection, frames)
 
     async def broadcast(self, message: dict, recipient_role: str):
-        for connection in self.active_connections.values():
+        frames = EncodedMessage(message)
+        for _, connection in self._connections():
             should_send = False
             target_role = connection["recipient_role"]
 
@@ -51,21 +162,53 @@ class ConnectionManager:
                 should_send = True
 
             if should_send:
-                try:
-                    await connection["ws"].send_json(message)
-                except Exception:
-                    pass
+                await self._deliver(connection, frames)
+
+    async def send_to_many(self, message: dict, recipient_ids: set[str]):
+        frames = EncodedMessage(message)
+        connected = len(self.active_connections) + len(self.stream_connections)
+        if len(recipient_ids) <= connected:
+            for recipient_id in recipient_ids:
+                for connection in self._connections_for(recipient_id):
+                    await self._deliver(connection, frames)
+            return
+
+        # Large segments: walk the open connections once instead.
+        for recipient_id, connection in self._connections():
+            if recipient_id in recipient_ids:
+                await self._deliver(connection, frames)
 
 
 ws_manager = ConnectionManager()
 
 
+def _is_active_recipient(recipient_id: str, recipient_role: str) -> bool:
+    try:
+        uid = uuid.UUID(recipient_id)
+    except ValueError:
+        return False
+
+    # Short-lived session: sockets stay open for hours and must not pin a
+    # pooled connection once the handshake is done.
+    db = SessionLocal()
+    try:
+        target = None
+        if recipient_role == 'member':
+            target = db.query(User).filter(User.user_id == uid).first()
+        elif recipient_role == 'trainer':
+            target = db.query(Trainer).filter(
+                Trainer.trainer_id == uid).first()
+
+        return bool(target and target.is_active)
+    finally:
+        db.close()
+
+
 @router.websocket("/ws/notifications/{recipient_id}/{recipient_role}")
 async def websocket_endpoint(
     websocket: WebSocket,
     recipient_id: str,
-    recipient_role: str,
-    db: Session = Depends(get_db)
+    recipient_role: str
 ):
     token = websocket.cookies.get(manager.cookie_name)
 
@@ -79,32 +222,109 @@ async def websocket_endpoint(
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
 
-    is_target_valid = False
-    try:
-        uid = uuid.UUID(recipient_id)
-        if recipient_role == 'member':
-            target = db.query(User).filter(User.user_id == uid).first()
-        elif recipient_role == 'trainer':
-            target = db.query(Trainer).filter(
-                Trainer.trainer_id == uid).first()
-
-        if target and target.is_active:
-            is_target_valid = True
-    except ValueError:
-        pass
+    # Acks on this socket are recorded for the path's recipient, so only that
+    # recipient may open it.
+    user_id = user.user_id if user.role == 'member' else getattr(user, "trainer_id", None)
+    if user.role != recipient_role or str(user_id) != recipient_id:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
 
-    if not is_target_valid:
+    if not _is_active_recipient(recipient_id, recipient_role):
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
 
-    await websocket.accept()
-    await ws_manager.connect(websocket, recipient_id, recipient_role)
+    # Clients opt into compact binary frames via the fitpro.msgpack subprotocol.
+    encoding, subprotocol = _negotiate_encoding(websocket)
+    await websocket.accept(subprotocol=subprotocol)
+    await ws_manager.connect(websocket, recipient_id, recipient_role, encoding)
 
+    recipient_uuid = uuid.UUID(recipient_id)
     try:
         while True:
-            await websocket.receive_text()
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                break
+            try:
+                ack = parse_ack(_decode_frame(frame))
+            except Exception:
+                ack = None
+            if ack:
+                event, notification_ids = ack
+                ack_buffer.add(notification_ids, recipient_uuid, recipient_role, event)
     except WebSocketDisconnect:
-        ws_manager.disconnect(recipient_id)
+        pass
+    ws_manager.disconnect(recipient_id)
+
+
+def _resolve_segment(db: Session, data: NotificationCreate) -> tuple[str, list[uuid.UUID]]:
+    if data.segment not in SEGMENTS:
+        raise HTTPException(
+            status_code=400, detail=f"Segment must be one of: {', '.join(sorted(SEGMENTS))}")
+
+    if data.segment == 'trainerClients':
+        if not data.segment_trainer_id:
+            raise HTTPException(
+                status_code=400, detail="segment_trainer_id is required for trainerClients")
+        try:
+            trainer_id = uuid.UUID(data.segment_trainer_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid UUID format")
+
+        trainer = db.query(Trainer.name).filter(Trainer.trainer_id == trainer_id).first()
+        if not trainer:
+            raise HTTPException(status_code=404, detail="Trainer not found")
+
+        label = f"Clients of {trainer.name}"
+        recipients = db.query(TrainerClient.user_id).join(
+            User, User.user_id == TrainerClient.user_id
+        ).filter(
+            TrainerClient.trainer_id == trainer_id,
+            TrainerClient.is_active == True,
+            User.is_active == True
+        ).distinct()
+    elif data.segment == 'inactiveMembers':
+        cutoff = datetime.now(timezone.utc) - timedelta(days=data.inactive_days)
+        label = f"Members inactive for {data.inactive_days}+ days"
+        recipients = db.query(User.user_id).filter(
+            User.is_active == True,
+            ~exists().where(
+                Attendance.user_id == User.user_id,
+                Attendance.check_in_time >= cutoff
+            )
+        )
+    else:
+        label = "Members checked in today"
+        recipients = db.query(Attendance.user_id).join(
+            User, User.user_id == Attendance.user_id
+        ).filter(
+            *checkin_day_filters(Attendance, gym_today()),
+            User.is_active == True
+        ).distinct()
+
+    return label, [row.user_id for row in recipients.all()]
+
+
+def _notification_payload(notification: Notifications, is_read: bool = False) -> dict:
+    return {
+        "id": notification.id,
+        "event_id": notification.dispatch_seq,
+        "message": notification.message,
+        "created_at": str(notification.created_at),
+        "is_read": is_read,
+        "recipient_id": str(notification.recipient_id),
+        "recipient_role": notification.recipient_role
+    }
+
+
+async def deliver_notification(notification: Notifications):
+    payload = _notification_payload(notification)
+
+    if notification.segment_recipient_ids:
+        await ws_manager.send_to_many(payload, {str(recipient_id) for recipient_id in notification.segment_recipient_ids})
+    elif notification.recipient_id:
+        await ws_manager.send_personal_message(payload, str(notification.recipient_id))
+    else:
+        await ws_manager.broadcast(payload, notification.recipient_role)
 
 
 @router.post("/sendNotification", status_code=status.HTTP_201_CREATED)
@@ -117,9 +337,16 @@ async def send_notification(data: NotificationCreate, db: Session = Depends(get_
             status_code=403, detail="Forbidden: Account is inactive")
 
     recipient_id_val = None
+    segment_label = None
+    segment_recipient_ids = None
 
     if data.recipient_role in ['all', 'allMembers', 'allTrainers']:
         recipient_id_val = None
+    elif data.recipient_role == 'segment':
+        segment_label, segment_recipient_ids = _resolve_segment(db, data)
+        if not segment_recipient_ids:
+            raise HTTPException(
+                status_code=404, detail="No active members match this segment")
     else:
         if data.recipient_role not in ['member', 'trainer']:
             raise HTTPException(
@@ -147,34 +374,118 @@ async def send_notification(data: NotificationCreate, db: Session = Depends(get_
             raise HTTPException(
                 status_code=404, detail="Recipient not found or inactive")
 
+    send_at = None
+    if data.send_at:
+        send_at = data.send_at if data.send_at.tzinfo else data.send_at.replace(tzinfo=timezone.utc)
+        if send_at <= datetime.now(timezone.utc):
+            send_at = None
+
     # Create DB Entry
     new_notification = Notifications(
         message=data.message,
         recipient_id=recipient_id_val,
-        recipient_role=data.recipient_role
+        recipient_role=data.recipient_role,
+        segment=data.segment if segment_recipient_ids else None,
+        segment_label=segment_label,
+        segment_recipient_ids=segment_recipient_ids,
+        send_at=send_at
     )
     db.add(new_notification)
     db.commit()
     db.refresh(new_notification)
 
+    if send_at:
+        notification_scheduler.schedule(new_notification.id, send_at)
+        return {"message": "Notification scheduled successfully", "id": new_notification.id, "send_at": send_at}
+
     # Real-time Send
-    ws_payload = {
-        "id": new_notification.id,
-        "message": new_notification.message,
-        "created_at": str(new_notification.created_at),
-        "is_read": False,
-        "recipient_id": str(new_notification.recipient_id),
-        "recipient_role": new_notification.recipient_role
-    }
+    await deliver_notification(new_notification)
 
-    if recipient_id_val:
-        await ws_manager.send_personal_message(ws_payload, str(recipient_id_val))
-    else:
-        await ws_manager.broadcast(ws_payload, data.recipient_role)
+    if segment_recipient_ids:
+        return {"message": "Notification sent successfully", "recipients": len(segment_recipient_ids)}
 
     return {"message": "Notification sent successfully"}
 
 
+def _missed_notifications(user_role: str, user_id: uuid.UUID, last_event_id: int) -> list[dict]:
+    db = SessionLocal()
+    try:
+        # Resume on delivery order, not id: a scheduled notification keeps its
+        # creation id but is dispatched after newer ones.
+        rows = recipient_notifications_query(db, user_role, user_id).filter(
+            Notifications.dispatch_seq > last_event_id
+        ).order_by(Notifications.dispatch_seq.asc()).limit(STREAM_RESUME_LIMIT).all()
+        return [
+            _notification_payload(notification, bool(status_row.is_read) if status_row else False)
+            for notification, status_row in rows
+        ]
+    finally:
+        db.close()
+
+
+def _sse_event(frames: EncodedMessage) -> str:
+    return f"id: {frames.message['event_id']}\nevent: notification\ndata: {frames.encode('json')}\n\n"
+
+
+@router.get("/notifications/stream")
+async def stream_notifications(
+    request: Request,
+    last_event_id: int | None = Query(None),
+    current_user=Depends(manager)
+):
+    if not current_user or not current_user.is_active:
+        raise HTTPException(status_code=403, detail="Active account required")
+
+    if current_user.role not in ['member', 'trainer']:
+        raise HTTPException(status_code=403, detail="Member or trainer access required")
+
+    if getattr(current_user, "email_verified", True) is False:
+        raise HTTPException(status_code=403, detail="Email not verified. Please verify your email to continue.")
+
+    user_role = current_user.role
+    user_id = current_user.user_id if user_role == 'member' else current_user.trainer_id
+
+    # Browsers send Last-Event-ID on reconnect; the query param covers the
+    # first connection of a new tab.
+    resume_header = request.headers.get("last-event-id")
+    if resume_header and resume_header.isdigit():
+        last_event_id = int(resume_header)
+
+    # Subscribe before reading the backlog so nothing sent in between is lost.
+    connection = ws_manager.subscribe(str(user_id), user_role)
+    missed = []
+    if last_event_id is not None:
+        missed = await run_in_threadpool(_missed_notifications, user_role, user_id, last_event_id)
+
+    async def event_stream():
+        sent_ids = set()
+        try:
+            yield f"retry: {STREAM_KEEPALIVE_SECONDS * 1000}\n\n"
+            for message in missed:
+                sent_ids.add(message["id"])
+                yield _sse_event(EncodedMessage(message))
+
+            while not connection["overflowed"]:
+                if await request.is_disconnected():
+                    break
+                try:
+                    frames = await asyncio.wait_for(connection["queue"].get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if frames.message["id"] in sent_ids:
+                    continue
+                yield _sse_event(frames)
+        finally:
+            ws_manager.unsubscribe(str(user_id), connection)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/notifications", status_code=status.HTTP_200_OK)
 def get_notifications(
     page: int = Query(1, ge=1),
@@ -222,32 +533,7 @@ def get_notifications(
     if current_user.role != 'admin':
         user_role = current_user.role
         user_id = current_user.user_id if user_role == 'member' else current_user.trainer_id
-
-        query = db.query(Notifications, NotificationStatus).outerjoin(
-            NotificationStatus,
-            and_(
-                NotificationStatus.notification_id == Notifications.id,
-                NotificationStatus.recipient_id == user_id,
-                NotificationStatus.recipient_role == user_role
-            ))
-
-        filters = [
-            and_(
-                Notifications.recipient_id == user_id,
-                Notifications.recipient_role == user_role
-            ),
-            Notifications.recipient_role == 'all',
-        ]
-
-        if user_role == 'member':
-            filters.append(Notifications.recipient_role == 'allMembers')
-        elif user_role == 'trainer':
-            filters.append(Notifications.recipient_role == 'allTrainers')
-
-        query = query.filter(or_(*filters))
-        query = query.filter(or_(
-            NotificationStatus.id == None, 
-            NotificationStatus.is_deleted == False))
+        query = recipient_notifications_query(db, user_role, user_id)
     else:
         if recipient_role:
             query = query.filter(Notifications.recipient_role == recipient_role)
@@ -285,16 +571,8 @@ def get_notifications(
     trainer_ids = {
         n.recipient_id for n, _ in normalized_rows if n.recipient_role == 'trainer' and n.recipient_id}
 
-    user_map = {}
-    if member_ids:
-        users = db.query(User.user_id, User.name).filter(User.user_id.in_(member_ids)).all()
-        user_map = {u.user_id: u.name for u in users}
-    
-
-    trainer_map = {}
-    if trainer_ids:
-        trainers = db.query(Trainer.trainer_id, Trainer.name).filter(Trainer.trainer_id.in_(trainer_ids)).all()
-        trainer_map = {t.trainer_id: t.name for t in trainers}
+    user_map = resolve_display_names(db, "member", member_ids)
+    trainer_map = resolve_display_names(db, "trainer", trainer_ids)
     
     final_notifications = []
     for n, status_row in normalized_rows:
@@ -304,6 +582,8 @@ def get_notifications(
             display_name = "All Members"
         elif n.recipient_role == 'allTrainers':
             display_name = "All Trainers"
+        elif n.recipient_role == 'segment':
+            display_name = n.segment_label or "Segment"
         elif n.recipient_role == 'member':
             display_name = user_map.get(n.recipient_id, f"Member Deleted ")
         elif n.recipient_role == 'trainer':
@@ -318,6 +598,8 @@ def get_notifications(
         "recipient_role": str(n.recipient_role),
         "recipient_name": display_name,
         "created_at": n.created_at,
+        "send_at": n.send_at,
+        "dispatched_at": n.dispatched_at,
         "is_read": bool(status_row.is_read) if status_row else False
         }
 
@@ -330,6 +612,29 @@ def get_notifications(
     }
 
 
+def _upsert_notification_status(db: Session, notification_ids: list[int], user_id, user_role: str, flags: dict) -> int:
+    notification_ids = set(notification_ids)
+    if not notification_ids:
+        return 0
+
+    statement = insert(NotificationStatus).values([
+        {
+            "notification_id": notification_id,
+            "recipient_id": user_id,
+            "recipient_role": user_role,
+            "is_read": False,
+            "is_deleted": False,
+            **flags
+        }
+        for notification_id in notification_ids
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=["notification_id", "recipient_id", "recipient_role"],
+        set_=flags
+    )
+    return db.execute(statement).rowcount
+
+
 @router.patch("/notifications/read", status_code=status.HTTP_200_OK)
 def mark_notifications_as_read(
     request: NotificationRequest,
@@ -345,32 +650,11 @@ def mark_notifications_as_read(
     user_role = current_user.role
     user_id = current_user.user_id if user_role == 'member' else current_user.trainer_id
 
-    query = db.query(NotificationStatus).filter(
-        NotificationStatus.notification_id.in_(request.notification_ids),
-        NotificationStatus.recipient_id == user_id,
-        NotificationStatus.recipient_role == user_role
-    )
-
-    existing_records = query.all()
-    existing_ids = {r.notification_id for r in existing_records}
-
-    affected_rows = query.update(
-        {NotificationStatus.is_read: True}, synchronize_session=False)
-
-    for n_id in request.notification_ids:
-        if n_id not in existing_ids:
-            new_status = NotificationStatus(
-                notification_id=n_id,
-                recipient_id=user_id,
-                recipient_role=user_role,
-                is_read=True,
-                is_deleted=False
-            )
-            db.add(new_status)
-
+    affected_rows = _upsert_notification_status(
+        db, request.notification_ids, user_id, user_role, {"is_read": True})
     db.commit()
 
-    return {"message": f"Successfully marked {affected_rows + (len(request.notification_ids) - len(existing_ids))} notifications as read"}
+    return {"message": f"Successfully marked {affected_rows} notifications as read"}
 
 
 @router.delete("/admin/notifications/delete", status_code=status.HTTP_200_OK)
@@ -392,6 +676,66 @@ def delete_admin_notifications(request: NotificationRequest, db: Session = Depen
     return {"message": f"Successfully deleted {affected_rows} notifications"}
 
 
+@router.post("/admin/notifications/retention", status_code=status.HTTP_200_OK)
+def run_admin_notification_retention(current_user: Admin = Depends(manager)):
+    if not current_user or current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin role required")
+
+    if not current_user.is_active:
+        raise HTTPException(
+            status_code=403, detail="Forbidden: Account is inactive")
+
+    try:
+        return run_notification_retention()
+    except Exception:
+        raise HTTPException(status_code=500, detail="Notification retention failed")
+
+
+@router.get("/admin/notifications/{notification_id}/deliveryStats", status_code=status.HTTP_200_OK)
+def get_notification_delivery_stats(
+    notification_id: int,
+    db: Session = Depends(get_db),
+    current_user: Admin = Depends(manager)
+):
+    if not current_user or current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin role required")
+
+    if not current_user.is_active:
+        raise HTTPException(
+            status_code=403, detail="Forbidden: Account is inactive")
+
+    notification = db.query(Notifications).filter(Notifications.id == notification_id).first()
+    if not notification:
+        raise HTTPException(status_code=404, detail="Notification not found")
+
+    if notification.recipient_role == 'segment':
+        audience = len(notification.segment_recipient_ids or [])
+    elif notification.recipient_id:
+        audience = 1
+    else:
+        audience = 0
+        if notification.recipient_role in ['all', 'allMembers']:
+            audience += read_counter(db, "members_active")
+        if notification.recipient_role in ['all', 'allTrainers']:
+            audience += read_counter(db, "trainers_active")
+
+    delivered, read, deleted = db.query(
+        func.count(NotificationStatus.id).filter(NotificationStatus.delivered_at.isnot(None)),
+        func.count(NotificationStatus.id).filter(NotificationStatus.is_read == True),
+        func.count(NotificationStatus.id).filter(NotificationStatus.is_deleted == True),
+    ).filter(NotificationStatus.notification_id == notification_id).one()
+
+    return {
+        "notification_id": notification_id,
+        "recipient_role": notification.recipient_role,
+        "audience": int(audience),
+        "delivered": int(delivered),
+        "read": int(read),
+        "deleted": int(deleted),
+        "delivery_rate": round(delivered / audience, 4) if audience else None
+    }
+
+
 @router.post('/notifications/delete', status_code=status.HTTP_200_OK)
 def delete_user_notification(request: NotificationSoftDelete, db: Session = Depends(get_db), current_user=Depends(manager)):
     if not current_user or not current_user.is_active:
@@ -406,30 +750,9 @@ def delete_user_notification(request: NotificationSoftDelete, db: Session = Depe
     user_role = current_user.role
     user_id = current_user.user_id if user_role == 'member' else current_user.trainer_id
     
-    query = db.query(NotificationStatus).filter(
-        NotificationStatus.notification_id.in_(request.notification_ids),
-        NotificationStatus.recipient_id == user_id,
-        NotificationStatus.recipient_role == user_role
-    )
-
-    existing_records = query.all()
-    existing_ids = {r.notification_id for r in existing_records}
-    
-    query.update({NotificationStatus.is_deleted: True}, synchronize_session=False)
-
-    
-    for n_id in request.notification_ids:
-        if n_id not in existing_ids:
-            new_status = NotificationStatus(
-                notification_id=n_id,
-                recipient_id=user_id,
-                recipient_role=user_role,
-                is_deleted=True,
-                is_read=False
-            )
-            db.add(new_status)
-    
     try:
+        _upsert_notification_status(
+            db, request.notification_ids, user_id, user_role, {"is_deleted": True})
         db.commit()
         return {"message": "Successfully deleted notifications"}
     except Exception:
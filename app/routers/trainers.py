@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, UploadFile, File, Header
 from sqlalchemy.orm import Session
 from app.db.database import get_db
 from app.db.models import (
@@ -10,6 +10,10 @@ from app.db.models import (
     TrainerPasswordResetToken,
 )
 from app.routers.auth import manager
+from app.idempotency import run_idempotent
+from app.display_names import invalidate_display_name
+from app.account_directory import resolve_account
+from sqlalchemy.exc import IntegrityError
 from app.routers.auth import _issue_trainer_email_verification_token, _build_verification_email_content
 from app.schemas.trainer_schema import (
     TrainerOut,
@@ -22,7 +26,7 @@ from app.schemas.trainer_schema import (
     TrainerResetPasswordConfirmIn,
 )
 from app.schemas.user_schema import SearchQuery
-from sqlalchemy import cast, String, text, func, or_
+from sqlalchemy import func, or_, null
 import uuid
 from app.routers.auth import pwd
 from datetime import datetime, timezone, timedelta
@@ -43,6 +47,9 @@ from app.config import (
     TRAINER_PASSWORD_CHANGE_COOLDOWN_MINUTES,
 )
 from app.email_templates import build_action_email_html, build_basic_email_html
+from app.time_windows import checkin_day_filters, gym_today, gym_local_date
+from app.pagination import listing_cursor, listing_keyset_filter
+from app.db.counters import read_counter, read_counters
 
 try:
     import cloudinary
@@ -194,10 +201,11 @@ def create_trainers(data: TrainerCreate, db: Session = Depends(get_db), current_
         )
 
     email_normalized = data.email.strip().lower()
-    existing_trainer = db.query(Trainer).filter(
-        Trainer.email == email_normalized).first()
-    if existing_trainer:
+    account_role, _ = resolve_account(db, email_normalized)
+    if account_role == "trainer":
         raise HTTPException(status_code=400, detail="Email already exists")
+    if account_role:
+        raise HTTPException(status_code=400, detail="This email cannot be used for trainer registration")
 
     hashed_pass = pwd.hash(data.password)
     new_trainer = Trainer(
@@ -214,7 +222,11 @@ def create_trainers(data: TrainerCreate, db: Session = Depends(get_db), current_
     )
 
     db.add(new_trainer)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Email already exists")
     db.refresh(new_trainer)
 
     verification_sent = False
@@ -250,26 +262,44 @@ def create_trainers(data: TrainerCreate, db: Session = Depends(get_db), current_
 @router.get("/trainers", status_code=status.HTTP_200_OK)
 def get_trainers(page: int = Query(1, ge=1),
                        limit: int = Query(50, ge=1),
+                       cursor: str | None = Query(None),
                        db: Session = Depends(get_db),
                        current_user: User | None = Depends(get_optional_user)):
 
-    skip = (page - 1) * limit
     is_admin = current_user and current_user.role == "admin" and current_user.is_active
 
-    query = db.query(Trainer)
-
-    if not is_admin:
-        query = query.filter(Trainer.is_active.is_(True))
-
-    total_trainers = query.count()
     if is_admin:
-        trainers = query.order_by(
-            func.lower(Trainer.name).asc(),
+        total_trainers = read_counter(db, "trainers_total")
+        sort_name = func.lower(Trainer.name)
+        query = db.query(Trainer, sort_name.label("sort_name")).order_by(
+            sort_name.asc(),
             Trainer.created_at.desc(),
             Trainer.trainer_id.asc()
-        ).offset(skip).limit(limit).all()
+        )
     else:
-        trainers = query.order_by(Trainer.created_at.desc()).offset(skip).limit(limit).all()
+        total_trainers = read_counter(db, "trainers_active")
+        sort_name = None
+        query = db.query(Trainer, null().label("sort_name")).filter(
+            Trainer.is_active.is_(True)
+        ).order_by(
+            Trainer.created_at.desc(),
+            Trainer.trainer_id.asc()
+        )
+
+    if cursor:
+        query = query.filter(listing_keyset_filter(cursor, Trainer.created_at, Trainer.trainer_id, sort_name))
+    elif page > 1:
+        query = query.offset((page - 1) * limit)
+
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    trainers = [row.Trainer for row in rows]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = listing_cursor(last.Trainer.created_at, last.Trainer.trainer_id, last.sort_name)
 
     trainer_ids = [trainer.trainer_id for trainer in trainers]
     client_count_rows = db.query(
@@ -289,7 +319,7 @@ def get_trainers(page: int = Query(1, ge=1),
 
     today_attendance_rows = db.query(TrainersAttendance).filter(
         TrainersAttendance.trainer_id.in_(trainer_ids),
-        func.date(TrainersAttendance.check_in_time) == func.current_date()
+        *checkin_day_filters(TrainersAttendance, gym_today())
     ).order_by(
         TrainersAttendance.check_in_time.desc()
     ).all() if trainer_ids else []
@@ -332,6 +362,7 @@ def get_trainers(page: int = Query(1, ge=1),
         "total_trainers": total_trainers,
         "page": page,
         "limit": limit,
+        "next_cursor": next_cursor,
         "access": "admin" if is_admin else "public"
     }
 
@@ -478,7 +509,7 @@ def get_trainer_summary(
 
     today_attendance = db.query(TrainersAttendance).filter(
         TrainersAttendance.trainer_id == trainer.trainer_id,
-        func.date(TrainersAttendance.check_in_time) == func.current_date()
+        *checkin_day_filters(TrainersAttendance, gym_today())
     ).order_by(
         TrainersAttendance.check_in_time.desc()
     ).first()
@@ -493,20 +524,21 @@ def get_trainer_summary(
         )
     )
 
-    start_7_days = now_utc.date() - timedelta(days=6)
+    today = gym_today()
+    start_7_days = today - timedelta(days=6)
     checkins_last_7_days = db.query(func.count(TrainersAttendance.id)).filter(
         TrainersAttendance.trainer_id == trainer.trainer_id,
-        func.date(TrainersAttendance.check_in_time) >= start_7_days
+        *checkin_day_filters(TrainersAttendance, start_7_days, today)
     ).scalar() or 0
 
     attendance_trend_rows = db.query(
-        func.date(TrainersAttendance.check_in_time).label("day"),
+        TrainersAttendance.check_in_date.label("day"),
         func.count(TrainersAttendance.id).label("count")
     ).filter(
         TrainersAttendance.trainer_id == trainer.trainer_id,
-        func.date(TrainersAttendance.check_in_time) >= start_7_days
+        *checkin_day_filters(TrainersAttendance, start_7_days, today)
     ).group_by(
-        func.date(TrainersAttendance.check_in_time)
+        TrainersAttendance.check_in_date
     ).all()
 
     attendance_trend_map = {row.day: int(row.count) for row in attendance_trend_rows}
@@ -519,10 +551,9 @@ def get_trainer_summary(
             "count": attendance_trend_map.get(day, 0)
         })
 
-    month_start = datetime(now_utc.year, now_utc.month, 1, tzinfo=timezone.utc)
     sessions_this_month = db.query(func.count(TrainersAttendance.id)).filter(
         TrainersAttendance.trainer_id == trainer.trainer_id,
-        TrainersAttendance.check_in_time >= month_start
+        *checkin_day_filters(TrainersAttendance, today.replace(day=1), today)
     ).scalar() or 0
 
     avg_session_minutes_value = db.query(
@@ -615,6 +646,7 @@ def update_trainer_profile(
     trainer.profile_updated_at = datetime.now(timezone.utc)
     db.commit()
     db.refresh(trainer)
+    invalidate_display_name("trainer", trainer.trainer_id)
 
     return {
         "message": "Trainer profile updated successfully",
@@ -887,6 +919,7 @@ def trainer_checkout(
 @router.post("/admin/trainerCheckin/{trainer_id}")
 def admin_checkin_trainer(
     trainer_id: str,
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db),
     current_user: Admin = Depends(manager)
 ):
@@ -899,47 +932,60 @@ def admin_checkin_trainer(
             detail="Forbidden: Account is inactive"
         )
 
-    try:
-        valid_trainer_id = uuid.UUID(trainer_id)
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid trainer ID format"
-        )
+    def record_trainer_checkin():
+        try:
+            valid_trainer_id = uuid.UUID(trainer_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid trainer ID format"
+            )
 
-    trainer = db.query(Trainer).filter(Trainer.trainer_id == valid_trainer_id).first()
-    if not trainer:
-        raise HTTPException(status_code=404, detail="Trainer not found")
+        trainer = db.query(Trainer).filter(Trainer.trainer_id == valid_trainer_id).first()
+        if not trainer:
+            raise HTTPException(status_code=404, detail="Trainer not found")
 
-    if not trainer.is_active:
-        raise HTTPException(status_code=403, detail="Trainer account is inactive")
+        if not trainer.is_active:
+            raise HTTPException(status_code=403, detail="Trainer account is inactive")
 
-    existing_today = db.query(TrainersAttendance).filter(
-        TrainersAttendance.trainer_id == valid_trainer_id,
-        func.date(TrainersAttendance.check_in_time) == func.current_date()
-    ).first()
+        existing_today = db.query(TrainersAttendance).filter(
+            TrainersAttendance.trainer_id == valid_trainer_id,
+            *checkin_day_filters(TrainersAttendance, gym_today())
+        ).first()
+
+        if existing_today:
+            return {
+                "message": "Trainer already checked in today",
+                "check_in_time": existing_today.check_in_time
+            }
+
+        check_in_time = datetime.now(timezone.utc)
+        check_out_time = check_in_time + timedelta(hours=8)
+        trainer_attendance = TrainersAttendance(
+            trainer_id=valid_trainer_id,
+            check_in_time=check_in_time,
+            check_in_date=gym_local_date(check_in_time),
+            check_out_time=check_out_time
+        )
+
+        db.add(trainer_attendance)
+        db.commit()
+        db.refresh(trainer_attendance)
 
-    if existing_today:
         return {
-            "message": "Trainer already checked in today",
-            "check_in_time": existing_today.check_in_time
+            "message": f"{trainer.name} checked in successfully",
+            "check_in_time": trainer_attendance.check_in_time
         }
 
-    check_out_time = datetime.now(timezone.utc) + timedelta(hours=8)
-    trainer_attendance = TrainersAttendance(
-        trainer_id=valid_trainer_id,
-        check_out_time=check_out_time
+    return run_idempotent(
+        idempotency_key,
+        "admin/trainerCheckin",
+        current_user,
+        trainer_id,
+        status.HTTP_200_OK,
+        record_trainer_checkin
     )
 
-    db.add(trainer_attendance)
-    db.commit()
-    db.refresh(trainer_attendance)
-
-    return {
-        "message": f"{trainer.name} checked in successfully",
-        "check_in_time": trainer_attendance.check_in_time
-    }
-
 
 @router.post("/admin/trainerCheckout/{trainer_id}", status_code=status.HTTP_200_OK)
 def admin_checkout_trainer(
@@ -970,7 +1016,7 @@ def admin_checkout_trainer(
 
     active_attendance = db.query(TrainersAttendance).filter(
         TrainersAttendance.trainer_id == valid_trainer_id,
-        func.date(TrainersAttendance.check_in_time) == func.current_date(),
+        *checkin_day_filters(TrainersAttendance, gym_today()),
         TrainersAttendance.auto_checkout.is_(True),
         or_(
             TrainersAttendance.check_out_time.is_(None),
@@ -1375,11 +1421,12 @@ def get_user(query: SearchQuery = Depends(), db: Session = Depends(get_db), curr
             detail="Forbidden: Account is inactive"
         )
 
-    search_val = str(query.search).strip()
-    trainer = db.query(Trainer).filter(
-        (Trainer.email == search_val) | (
-            cast(Trainer.trainer_id, String) == search_val)
-    ).first()
+    # Compare the UUID column against a UUID so the trainer_id index is usable.
+    if isinstance(query.search, uuid.UUID):
+        trainer_filter = Trainer.trainer_id == query.search
+    else:
+        trainer_filter = Trainer.email == str(query.search).strip()
+    trainer = db.query(Trainer).filter(trainer_filter).first()
 
     if not trainer:
         raise HTTPException(status_code=404, detail="Trainer not found")
@@ -1393,7 +1440,7 @@ def get_user(query: SearchQuery = Depends(), db: Session = Depends(get_db), curr
 
     today_attendance = db.query(TrainersAttendance).filter(
         TrainersAttendance.trainer_id == trainer.trainer_id,
-        func.date(TrainersAttendance.check_in_time) == func.current_date()
+        *checkin_day_filters(TrainersAttendance, gym_today())
     ).order_by(
         TrainersAttendance.check_in_time.desc()
     ).first()
@@ -1458,8 +1505,10 @@ def get_total_trainers(db:Session=Depends(get_db), current_user: Admin = Depends
             detail="Forbidden: Account is inactive"
         )
     
-    stats = db.execute(
-        text("SELECT count FROM site_statistics WHERE label = 'active_trainers'")).fetchone()
-    active_trainers = stats[0] if stats else 0
+    counts = read_counters(db, ["trainers_total", "trainers_active", "trainers_verified"])
 
-    return {"active_trainers": active_trainers}
+    return {
+        "active_trainers": counts["trainers_active"],
+        "total_trainers": counts["trainers_total"],
+        "verified_trainers": counts["trainers_verified"]
+    }
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, BackgroundTasks
 from sqlalchemy.orm import Session
 import mailtrap as mt
 import html
@@ -13,13 +13,15 @@ from app.schemas.user_schema import (
     MemberVerifyOldPasswordIn,
     MemberChangePasswordIn,
 )
-from sqlalchemy import cast, String, text, func, or_
+from sqlalchemy import cast, Numeric, text, func, or_, and_, case
 from pydantic import EmailStr
 from datetime import date, timedelta, datetime, timezone
 import uuid
 import re
+from decimal import Decimal, InvalidOperation
 import io
 import json
+import base64
 from urllib import error as urllib_error, request as urllib_request
 from app.config import (
     CLOUDINARY_CLOUD_NAME,
@@ -27,8 +29,29 @@ from app.config import (
     CLOUDINARY_API_SECRET,
     MEMBER_PROFILE_CHANGE_COOLDOWN_MINUTES,
     MAILTRAP_API_KEY,
+    GYM_TIMEZONE,
+    SEARCH_FUZZY_THRESHOLD,
 )
 from app.email_templates import build_basic_email_html
+from app.time_windows import days_window, checkin_day_filters, gym_today, gym_local_date
+from app.attendance_archive import archive_cutoff, read_archived_attendance, iter_archived_attendance, oldest_archived_month
+from app.display_names import invalidate_display_name
+from app.member_index import member_index, index_member
+from app.member_import import create_import_job, run_import_job, read_import_job
+from app.attendance_calendar import (
+    BITMAP_ENCODING,
+    attended_days,
+    count_days_between,
+    current_streak,
+    days_in_year,
+    empty_bitmap,
+    last_attended_day,
+    load_bitmaps,
+    longest_streak,
+    monthly_counts,
+)
+from app.pagination import encode_cursor, decode_cursor, listing_cursor, listing_keyset_filter
+from app.db.counters import read_counter, read_counters
 
 try:
     import cloudinary
@@ -56,6 +79,37 @@ if cloudinary and CLOUDINARY_CLOUD_NAME and CLOUDINARY_API_KEY and CLOUDINARY_AP
     )
 
 
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+# searchByName's contains/prefix order; loadtest/query_plans.py checks the
+# plan of these same expressions.
+NAME_SEARCH_ORDER = (User.name.asc(), User.user_id.asc())
+
+
+def name_search_matches(term: str, mode: str, match_email: bool = False, phone_match=None) -> list:
+    """LIKE predicates for searchByName's contains and prefix modes."""
+    escaped = _escape_like(term)
+    # Prefix mode is served by the text_pattern_ops indexes; contains uses
+    # the trigram indexes for terms of three or more characters.
+    pattern = f"{escaped}%" if mode == "prefix" else f"%{escaped}%"
+    matches = [func.lower(User.name).like(pattern, escape="\\")]
+    if match_email:
+        matches.append(func.lower(User.email).like(pattern, escape="\\"))
+    if phone_match is not None:
+        matches.append(phone_match)
+    return matches
+
+
+def _decode_search_cursor(cursor: str, sort_type) -> tuple:
+    sort_value, user_id = decode_cursor(cursor, 2)
+    try:
+        return sort_type(sort_value), uuid.UUID(str(user_id))
+    except (ValueError, TypeError, InvalidOperation):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
 def _normalize_utc_datetime(value: datetime | None) -> datetime | None:
     if value is None:
         return None
@@ -122,6 +176,7 @@ def _send_email(recipient: str, subject: str, body: str, html_body: str | None =
 def get_all_users(
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1),
+    cursor: str | None = Query(None),
     db: Session = Depends(get_db),
     current_user: Admin = Depends(manager)
 ):
@@ -134,26 +189,81 @@ def get_all_users(
             detail="Forbidden: Account is inactive"
         )
 
-    skip = (page - 1) * limit
-    stats = db.execute(
-        text("SELECT count FROM site_statistics WHERE label = 'total_users'")).fetchone()
-    total_users = stats[0] if stats else 0
+    total_users = read_counter(db, "members_total")
 
-    users = db.query(User).order_by(
-        func.lower(User.name).asc(),
+    sort_name = func.lower(User.name)
+    query = db.query(User, sort_name.label("sort_name")).order_by(
+        sort_name.asc(),
         User.created_at.desc(),
         User.user_id.asc()
-    ).offset(skip).limit(limit).all()
-    safe_users = [UserOut.model_validate(u) for u in users]
+    )
+    if cursor:
+        query = query.filter(listing_keyset_filter(cursor, User.created_at, User.user_id, sort_name))
+    elif page > 1:
+        query = query.offset((page - 1) * limit)
+
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    safe_users = [UserOut.model_validate(row.User) for row in rows]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = listing_cursor(last.User.created_at, last.User.user_id, last.sort_name)
 
     return {
         "users": safe_users,
         "total_users": total_users,
         "page": page,
-        "limit": limit
+        "limit": limit,
+        "next_cursor": next_cursor
     }
 
 
+@router.post("/admin/members/import", status_code=status.HTTP_202_ACCEPTED)
+def import_members_csv(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    mark_verified: bool = Query(False),
+    current_user: Admin = Depends(manager)
+):
+    if not current_user or current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin role required")
+
+    if not current_user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Forbidden: Account is inactive"
+        )
+
+    if file.filename and not file.filename.lower().endswith(".csv"):
+        raise HTTPException(status_code=400, detail="Upload a .csv file")
+
+    # Hashing and loading a large file outlives any proxy timeout, so the
+    # upload is spooled to disk and imported after the response is sent.
+    job = create_import_job(file.file, mark_verified, str(current_user.admin_id))
+    background_tasks.add_task(run_import_job, dict(job))
+    return job
+
+
+@router.get("/admin/members/import/jobs/{job_id}", status_code=status.HTTP_200_OK)
+def get_member_import_job(job_id: str, current_user: Admin = Depends(manager)):
+    if not current_user or current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin role required")
+
+    if not current_user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Forbidden: Account is inactive"
+        )
+
+    job = read_import_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
+
 @router.get("/member/profile", status_code=status.HTTP_200_OK)
 def get_member_profile(
     db: Session = Depends(get_db),
@@ -221,6 +331,8 @@ def update_member_profile(
 
     db.commit()
     db.refresh(member)
+    invalidate_display_name("member", member.user_id)
+    index_member(member)
 
     return {
         "message": "Profile updated successfully",
@@ -413,11 +525,12 @@ def get_user(query: SearchQuery = Depends(), db: Session = Depends(get_db), curr
             detail="Forbidden: Account is inactive"
         )
 
-    search_val = str(query.search).strip()
-    user = db.query(User).filter(
-        (User.email == search_val) | (
-            cast(User.user_id, String) == search_val)
-    ).first()
+    # Compare the UUID column against a UUID so the user_id index is usable.
+    if isinstance(query.search, uuid.UUID):
+        user_filter = User.user_id == query.search
+    else:
+        user_filter = User.email == str(query.search).strip()
+    user = db.query(User).filter(user_filter).first()
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -434,6 +547,10 @@ def search_users_by_name(
     name: str = Query(..., min_length=1, max_length=100),
     limit: int = Query(12, ge=1, le=50),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None),
+    mode: str = Query("contains", pattern="^(contains|prefix|fuzzy)$"),
+    match_email: bool = Query(False),
+    match_phone: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: Admin = Depends(manager)
 ):
@@ -450,13 +567,57 @@ def search_users_by_name(
     if not normalized_name:
         raise HTTPException(status_code=400, detail="Name is required")
 
-    matched_users = db.query(User).filter(
-        User.name.ilike(f"%{normalized_name}%")
-    ).order_by(
-        User.name.asc(),
-        User.created_at.desc(),
-        User.user_id.asc()
-    ).offset(offset).limit(limit + 1).all()
+    term = normalized_name.lower()
+    name_expr = func.lower(User.name)
+    email_expr = func.lower(User.email)
+    phone_digits = re.sub(r"\D", "", term)
+    phone_match = User.phone.like(f"%{phone_digits}%") if match_phone and len(phone_digits) >= 3 else None
+
+    if mode == "fuzzy":
+        # Trigram similarity tolerates typos; `%` lets the GIN index pick the
+        # candidates and the rounded score gives a stable keyset order. `%`
+        # compares against pg_trgm.similarity_threshold, so it is set to the
+        # configured threshold for this transaction.
+        db.execute(
+            text("SELECT set_config('pg_trgm.similarity_threshold', :threshold, true)"),
+            {"threshold": str(SEARCH_FUZZY_THRESHOLD)}
+        )
+        score = func.similarity(name_expr, term)
+        candidates = [name_expr.op("%")(term)]
+        if match_email:
+            score = func.greatest(score, func.similarity(email_expr, term))
+            candidates.append(email_expr.op("%")(term))
+        if phone_match is not None:
+            # Phone digits are matched exactly and rank with a full score.
+            score = func.greatest(score, case((phone_match, 1.0), else_=0.0))
+            candidates.append(phone_match)
+        score = func.round(cast(score, Numeric), 4)
+
+        query = db.query(User, score.label("score")).filter(
+            or_(*candidates),
+            score >= SEARCH_FUZZY_THRESHOLD
+        )
+        if cursor:
+            cursor_score, cursor_user_id = _decode_search_cursor(cursor, Decimal)
+            query = query.filter(or_(
+                score < cursor_score,
+                and_(score == cursor_score, User.user_id > cursor_user_id)
+            ))
+        rows = query.order_by(score.desc(), User.user_id.asc()).limit(limit + 1).all()
+        matched_users = [row[0] for row in rows]
+        cursor_values = [[str(row.score), str(row[0].user_id)] for row in rows]
+    else:
+        query = db.query(User).filter(or_(*name_search_matches(term, mode, match_email, phone_match)))
+        if cursor:
+            cursor_name, cursor_user_id = _decode_search_cursor(cursor, str)
+            query = query.filter(or_(
+                User.name > cursor_name,
+                and_(User.name == cursor_name, User.user_id > cursor_user_id)
+            ))
+        elif offset:
+            query = query.offset(offset)
+        matched_users = query.order_by(*NAME_SEARCH_ORDER).limit(limit + 1).all()
+        cursor_values = [[user.name, str(user.user_id)] for user in matched_users]
 
     has_more = len(matched_users) > limit
     visible_users = matched_users[:limit]
@@ -478,7 +639,51 @@ def search_users_by_name(
         "limit": limit,
         "offset": offset,
         "has_more": has_more,
-        "next_offset": offset + len(users)
+        "next_offset": offset + len(users),
+        "next_cursor": encode_cursor(cursor_values[limit - 1]) if has_more else None
+    }
+
+
+@router.get("/users/autocomplete", status_code=status.HTTP_200_OK)
+def autocomplete_members(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(8, ge=1, le=20),
+    db: Session = Depends(get_db),
+    current_user: Admin = Depends(manager)
+):
+    if not current_user or current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin role required")
+
+    if not current_user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Forbidden: Account is inactive"
+        )
+
+    prefix = " ".join(q.split()).strip()
+    if not prefix:
+        raise HTTPException(status_code=400, detail="Query is required")
+
+    suggestions = member_index.search(prefix, limit)
+    if suggestions is not None:
+        return {"suggestions": suggestions, "source": "index"}
+
+    # Index still building or over its memory budget: answer from the database
+    # with the same full-name, name-word and email prefix matching.
+    escaped = _escape_like(prefix.lower())
+    pattern = f"{escaped}%"
+    matched_users = db.query(User.user_id, User.name, User.email, User.is_active).filter(or_(
+        func.lower(User.name).like(pattern, escape="\\"),
+        func.lower(User.name).like(f"% {escaped}%", escape="\\"),
+        func.lower(User.email).like(pattern, escape="\\")
+    )).order_by(User.name.asc(), User.user_id.asc()).limit(limit).all()
+
+    return {
+        "suggestions": [
+            {"user_id": str(user.user_id), "name": user.name, "email": user.email, "is_active": user.is_active}
+            for user in matched_users
+        ],
+        "source": "database"
     }
 
 
@@ -505,7 +710,7 @@ def preview_user_by_email(
 
     already_checked_in = db.query(Attendance).filter(
         Attendance.user_id == member.user_id,
-        func.date(Attendance.check_in_time) == func.current_date()
+        *checkin_day_filters(Attendance, gym_today())
     ).first()
 
     return {
@@ -522,6 +727,8 @@ def preview_user_by_email(
 def get_member_records_for_admin(
     user_id: str,
     attendance_limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None),
+    summary_months: int = Query(12, ge=0, le=120),
     db: Session = Depends(get_db),
     current_user: Admin = Depends(manager)
 ):
@@ -542,21 +749,22 @@ def get_member_records_for_admin(
             detail="Invalid ID format, a valid UUID is required!"
         )
 
-    member = db.query(User).filter(User.user_id == valid_user_id).first()
-    if not member:
+    member_row = db.query(User, TrainerClient, Trainer).outerjoin(
+        TrainerClient,
+        and_(TrainerClient.user_id == User.user_id, TrainerClient.is_active.is_(True))
+    ).outerjoin(
+        Trainer, Trainer.trainer_id == TrainerClient.trainer_id
+    ).filter(
+        User.user_id == valid_user_id
+    ).order_by(
+        TrainerClient.assign_at.desc().nullslast()
+    ).first()
+    if not member_row:
         raise HTTPException(status_code=404, detail="Member not found")
-
-    active_assignment = db.query(TrainerClient).filter(
-        TrainerClient.user_id == member.user_id,
-        TrainerClient.is_active.is_(True)
-    ).order_by(TrainerClient.assign_at.desc()).first()
+    member, active_assignment, trainer = member_row
 
     trainer_payload = None
     if active_assignment:
-        trainer = db.query(Trainer).filter(
-            Trainer.trainer_id == active_assignment.trainer_id
-        ).first()
-
         trainer_payload = {
             "trainer_id": str(active_assignment.trainer_id),
             "name": trainer.name if trainer else "Unknown Trainer",
@@ -564,39 +772,261 @@ def get_member_records_for_admin(
             "trainer_available": bool(trainer and trainer.is_active)
         }
 
-    attendance_rows = db.query(Attendance).filter(
+    attendance_query = db.query(Attendance).filter(
         Attendance.user_id == member.user_id
-    ).order_by(
-        Attendance.check_in_time.desc()
-    ).limit(attendance_limit).all()
-
-    attendance_history = []
-    for attendance in attendance_rows:
-        duration_minutes = None
-        if attendance.check_in_time and attendance.check_out_time and attendance.check_out_time >= attendance.check_in_time:
-            duration_minutes = int(
-                (attendance.check_out_time - attendance.check_in_time).total_seconds() // 60
+    )
+    upper_key = None
+    if cursor:
+        cursor_time, cursor_id = decode_cursor(cursor, 2)
+        try:
+            cursor_time, cursor_id = datetime.fromisoformat(cursor_time), int(cursor_id)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+        upper_key = (cursor_time, cursor_id)
+        # The plain upper bound on check_in_time lets newer partitions be pruned.
+        attendance_query = attendance_query.filter(
+            Attendance.check_in_time <= cursor_time,
+            or_(
+                Attendance.check_in_time < cursor_time,
+                and_(Attendance.check_in_time == cursor_time, Attendance.id < cursor_id)
             )
+        )
 
-        attendance_history.append({
+    attendance_rows = attendance_query.order_by(
+        Attendance.check_in_time.desc(),
+        Attendance.id.desc()
+    ).limit(attendance_limit + 1).all()
+    attendance_records = [
+        {
             "attendance_id": attendance.id,
             "check_in_time": attendance.check_in_time,
             "check_out_time": attendance.check_out_time,
-            "duration_minutes": duration_minutes,
             "verified_by_admin": bool(attendance.verified_by_admin),
-            "auto_checkout": bool(attendance.auto_checkout)
-        })
+            "auto_checkout": bool(attendance.auto_checkout),
+            "source": "live"
+        }
+        for attendance in attendance_rows
+    ]
+
+    # Once the live rows run out, keep paging into the parquet archive; it
+    # only holds check-ins older than what is still live.
+    archive_start = oldest_archived_month() if len(attendance_records) <= attendance_limit else None
+    if archive_start:
+        if attendance_records:
+            upper_key = (attendance_records[-1]["check_in_time"], attendance_records[-1]["attendance_id"])
+        archive_end = upper_key[0] + timedelta(microseconds=1) if upper_key else datetime.now(timezone.utc)
+        seen_ids = {record["attendance_id"] for record in attendance_records}
+        for archived_month in iter_archived_attendance(archive_start, archive_end, member.user_id, newest_first=True):
+            for archived in archived_month:
+                if archived["id"] in seen_ids or (upper_key and (archived["check_in_time"], archived["id"]) >= upper_key):
+                    continue
+                attendance_records.append({
+                    "attendance_id": archived["id"],
+                    "check_in_time": archived["check_in_time"],
+                    "check_out_time": archived["check_out_time"],
+                    "verified_by_admin": bool(archived["verified_by_admin"]),
+                    "auto_checkout": bool(archived["auto_checkout"]),
+                    "source": "archive"
+                })
+                if len(attendance_records) > attendance_limit:
+                    break
+            if len(attendance_records) > attendance_limit:
+                break
+
+    next_cursor = None
+    if len(attendance_records) > attendance_limit:
+        attendance_records = attendance_records[:attendance_limit]
+        next_cursor = encode_cursor([
+            attendance_records[-1]["check_in_time"].isoformat(), attendance_records[-1]["attendance_id"]
+        ])
+
+    monthly_summary = []
+    if summary_months:
+        today = gym_today()
+        first_month = date(today.year, today.month, 1)
+        for _ in range(summary_months - 1):
+            first_month = (first_month - timedelta(days=1)).replace(day=1)
+        summary_month = func.date_trunc("month", Attendance.check_in_date)
+        session_filter = and_(
+            Attendance.check_out_time.isnot(None),
+            Attendance.check_out_time >= Attendance.check_in_time,
+            or_(
+                Attendance.auto_checkout.is_(False),
+                Attendance.check_out_time <= func.now()
+            )
+        )
+        duration_minutes = func.extract("epoch", Attendance.check_out_time - Attendance.check_in_time) / 60.0
+        summary_rows = db.query(
+            summary_month.label("month"),
+            func.count(Attendance.id).label("checkins"),
+            func.array_agg(func.distinct(Attendance.check_in_date)).label("days"),
+            func.sum(duration_minutes).filter(session_filter).label("session_minutes"),
+            func.count(Attendance.id).filter(session_filter).label("sessions"),
+            func.sum(case((Attendance.verified_by_admin.is_(True), 1), else_=0)).label("manual_checkins")
+        ).filter(
+            Attendance.user_id == member.user_id,
+            *checkin_day_filters(Attendance, first_month, today)
+        ).group_by(summary_month).all()
+
+        # Sums and day sets rather than averages, so live and archived rows
+        # for the same month combine exactly.
+        months = {}
+        for row in summary_rows:
+            months[row.month.strftime("%Y-%m")] = {
+                "checkins": int(row.checkins),
+                "days": set(row.days or []),
+                "session_minutes": float(row.session_minutes or 0),
+                "sessions": int(row.sessions),
+                "manual_checkins": int(row.manual_checkins or 0),
+            }
+
+        summary_start, _ = days_window(first_month, today, GYM_TIMEZONE)
+        summary_end = min(archive_cutoff(), datetime.now(timezone.utc))
+        if summary_start < summary_end:
+            now = datetime.now(timezone.utc)
+            for archived_month in iter_archived_attendance(summary_start, summary_end, member.user_id):
+                for archived in archived_month:
+                    check_in, check_out = archived["check_in_time"], archived["check_out_time"]
+                    check_in_day = gym_local_date(check_in)
+                    totals = months.setdefault(check_in_day.strftime("%Y-%m"), {
+                        "checkins": 0, "days": set(), "session_minutes": 0.0, "sessions": 0, "manual_checkins": 0
+                    })
+                    totals["checkins"] += 1
+                    totals["days"].add(check_in_day)
+                    totals["manual_checkins"] += int(bool(archived["verified_by_admin"]))
+                    if check_out and check_out >= check_in and (not archived["auto_checkout"] or check_out <= now):
+                        totals["session_minutes"] += (check_out - check_in).total_seconds() / 60.0
+                        totals["sessions"] += 1
+
+        monthly_summary = [
+            {
+                "month": month,
+                "checkins": totals["checkins"],
+                "active_days": len(totals["days"]),
+                "manual_checkins": totals["manual_checkins"],
+                "avg_session_minutes": round(totals["session_minutes"] / totals["sessions"], 1) if totals["sessions"] else 0.0
+            }
+            for month, totals in sorted(months.items(), reverse=True)
+        ]
+
+    attendance_history = []
+    for record in attendance_records:
+        check_in_time, check_out_time = record["check_in_time"], record["check_out_time"]
+        record["duration_minutes"] = int(
+            (check_out_time - check_in_time).total_seconds() // 60
+        ) if check_in_time and check_out_time and check_out_time >= check_in_time else None
+        attendance_history.append(record)
 
     return {
         "member_user_id": str(member.user_id),
         "personal_trainer": trainer_payload,
         "attendance_history": attendance_history,
-        "attendance_count": len(attendance_history)
+        "attendance_count": len(attendance_history),
+        "next_cursor": next_cursor,
+        "monthly_summary": monthly_summary,
+        # Rows before this instant are served from the parquet archive.
+        "archive_cutoff": archive_cutoff()
     }
 
 
-@router.get("/memberDashboardInsights", status_code=status.HTTP_200_OK)
-def get_member_dashboard_insights(
+@router.get("/admin/memberHistory/{user_id}", status_code=status.HTTP_200_OK)
+def get_member_long_range_history(
+    user_id: str,
+    start_date: date | None = Query(None),
+    end_date: date | None = Query(None),
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    current_user: Admin = Depends(manager)
+):
+    if not current_user or current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin role required")
+
+    if not current_user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Forbidden: Account is inactive"
+        )
+
+    try:
+        valid_user_id = uuid.UUID(user_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid ID format, a valid UUID is required!"
+        )
+
+    last_day = end_date or gym_today()
+    first_day = start_date or last_day - timedelta(days=365)
+    if first_day > last_day:
+        raise HTTPException(status_code=400, detail="start_date cannot be after end_date")
+
+    member = db.query(User).filter(User.user_id == valid_user_id).first()
+    if not member:
+        raise HTTPException(status_code=404, detail="Member not found")
+
+    range_start, range_end = days_window(first_day, last_day, GYM_TIMEZONE)
+
+    live_rows = db.query(Attendance).filter(
+        Attendance.user_id == member.user_id,
+        Attendance.check_in_time >= range_start,
+        Attendance.check_in_time < range_end
+    ).order_by(
+        Attendance.check_in_time.desc()
+    ).limit(limit).all()
+
+    records = {}
+    for attendance in live_rows:
+        records[attendance.id] = {
+            "attendance_id": attendance.id,
+            "check_in_time": attendance.check_in_time,
+            "check_out_time": attendance.check_out_time,
+            "verified_by_admin": bool(attendance.verified_by_admin),
+            "auto_checkout": bool(attendance.auto_checkout),
+            "source": "live"
+        }
+
+    archived_count = 0
+    if range_start < archive_cutoff():
+        for archived in read_archived_attendance(member.user_id, range_start, range_end):
+            if archived["id"] in records:
+                continue
+            archived_count += 1
+            records[archived["id"]] = {
+                "attendance_id": archived["id"],
+                "check_in_time": archived["check_in_time"],
+                "check_out_time": archived["check_out_time"],
+                "verified_by_admin": bool(archived["verified_by_admin"]),
+                "auto_checkout": bool(archived["auto_checkout"]),
+                "source": "archive"
+            }
+
+    attendance_history = sorted(
+        records.values(),
+        key=lambda record: record["check_in_time"],
+        reverse=True
+    )[:limit]
+
+    for record in attendance_history:
+        check_in_time = record["check_in_time"]
+        check_out_time = record["check_out_time"]
+        record["duration_minutes"] = int(
+            (check_out_time - check_in_time).total_seconds() // 60
+        ) if check_in_time and check_out_time and check_out_time >= check_in_time else None
+
+    return {
+        "member_user_id": str(member.user_id),
+        "start_date": first_day.isoformat(),
+        "end_date": last_day.isoformat(),
+        "attendance_history": attendance_history,
+        "attendance_count": len(attendance_history),
+        "archived_count": archived_count,
+        "truncated": len(records) > limit
+    }
+
+
+@router.get("/member/attendanceCalendar", status_code=status.HTTP_200_OK)
+def get_member_attendance_calendar(
+    year: int | None = Query(None, ge=2000, le=2100),
     db: Session = Depends(get_db),
     current_user: User = Depends(manager)
 ):
@@ -615,86 +1045,155 @@ def get_member_dashboard_insights(
             detail="Email not verified. Please verify your email to continue."
         )
 
-    today = date.today()
-    start_of_7_days = today - timedelta(days=6)
-    start_of_30_days = today - timedelta(days=30)
+    today = gym_today()
+    year = year or today.year
+    bitmaps = load_bitmaps(db, current_user.user_id)
+    bitmap = bitmaps.get(year, empty_bitmap())
 
-    attendance_this_month = db.query(
-        func.count(func.distinct(func.date(Attendance.check_in_time)))
-    ).filter(
-        Attendance.user_id == current_user.user_id,
-        Attendance.check_in_time >= func.date_trunc("month", func.now())
-    ).scalar() or 0
-
-    checkins_last_7_days = db.query(
-        func.count(func.distinct(func.date(Attendance.check_in_time)))
-    ).filter(
-        Attendance.user_id == current_user.user_id,
-        func.date(Attendance.check_in_time) >= start_of_7_days
-    ).scalar() or 0
+    return {
+        "year": year,
+        "encoding": BITMAP_ENCODING,
+        "days": base64.b64encode(bitmap).decode(),
+        "days_in_year": days_in_year(year),
+        "attended_days": attended_days(bitmap),
+        "monthly_counts": monthly_counts(bitmap, year),
+        "longest_streak_days": longest_streak(bitmap, year),
+        "current_streak_days": current_streak(bitmaps, today),
+        "available_years": sorted(bitmaps)
+    }
 
-    total_checkins = db.query(func.count(Attendance.id)).filter(
-        Attendance.user_id == current_user.user_id
-    ).scalar() or 0
 
-    avg_session_minutes_30_days = db.query(
-        func.avg(
-            func.extract("epoch", Attendance.check_out_time - Attendance.check_in_time) / 60.0
-        )
-    ).filter(
-        Attendance.user_id == current_user.user_id,
-        func.date(Attendance.check_in_time) >= start_of_30_days,
-        Attendance.check_out_time.isnot(None),
-        Attendance.check_out_time >= Attendance.check_in_time,
-        or_(
-            Attendance.auto_checkout.is_(False),
-            Attendance.check_out_time <= func.now()
-        )
+# One round trip for the member dashboard. Day-level figures (month, 7-day,
+# streak) come from the member's attendance bitmaps; the attendance rows are
+# read only inside the 30-day window, bounded on check_in_time so the planner
+# prunes to the partitions that window covers.
+MEMBER_DASHBOARD_INSIGHTS_SQL = text("""
+WITH stats AS (
+    SELECT
+        avg(extract(epoch FROM check_out_time - check_in_time) / 60.0) FILTER (
+            WHERE check_out_time IS NOT NULL
+              AND check_out_time >= check_in_time
+              AND (auto_checkout IS FALSE OR check_out_time <= now())
+        ) AS avg_session_minutes_30_days
+    FROM attendances
+    WHERE user_id = :user_id
+      AND check_in_date BETWEEN :start_30 AND :today
+      AND check_in_time >= :start_instant AND check_in_time < :end_instant
+),
+last_visit AS (
+    SELECT max(check_in_time) AS last_check_in
+    FROM attendances
+    WHERE user_id = :user_id
+      AND check_in_time >= :start_instant AND check_in_time < :end_instant
+),
+bitmaps AS (
+    SELECT array_agg(year ORDER BY year) AS bitmap_years, array_agg(days ORDER BY year) AS bitmap_days
+    FROM attendance_bitmaps
+    WHERE user_id = :user_id
+),
+assignment AS (
+    SELECT trainer_id, assign_at
+    FROM trainers_client
+    WHERE user_id = :user_id AND is_active IS TRUE
+    ORDER BY assign_at DESC
+    LIMIT 1
+)
+SELECT
+    stats.avg_session_minutes_30_days,
+    last_visit.last_check_in,
+    bitmaps.bitmap_years,
+    bitmaps.bitmap_days,
+    trainers.trainer_id,
+    trainers.name AS trainer_name,
+    trainers.specializations,
+    trainers.experience_years,
+    trainers.short_bio,
+    trainers.certifications,
+    assignment.assign_at
+FROM stats
+CROSS JOIN last_visit
+CROSS JOIN bitmaps
+LEFT JOIN assignment ON true
+LEFT JOIN trainers ON trainers.trainer_id = assignment.trainer_id
+""")
+
+
+def _last_check_in_before_window(db: Session, user_id, bitmaps: dict[int, bytes]) -> datetime | None:
+    # The bitmaps name the last attended day, so only that day's partition (or
+    # archive month) is read instead of scanning every partition for a max.
+    day = last_attended_day(bitmaps)
+    if day is None:
+        return None
+    day_start, day_end = days_window(day, day, GYM_TIMEZONE)
+    last_check_in = db.query(func.max(Attendance.check_in_time)).filter(
+        Attendance.user_id == user_id,
+        Attendance.check_in_time >= day_start,
+        Attendance.check_in_time < day_end
     ).scalar()
+    if last_check_in is None:
+        records = read_archived_attendance(user_id, day_start, day_end)
+        if records:
+            last_check_in = records[-1]["check_in_time"]
+    return last_check_in
 
-    distinct_checkin_dates_rows = db.query(
-        func.date(Attendance.check_in_time).label("day")
-    ).filter(
-        Attendance.user_id == current_user.user_id,
-        func.date(Attendance.check_in_time) >= today - timedelta(days=120)
-    ).group_by(
-        func.date(Attendance.check_in_time)
-    ).all()
-
-    distinct_checkin_dates = {row.day for row in distinct_checkin_dates_rows}
-    streak_cursor = today if today in distinct_checkin_dates else today - timedelta(days=1)
-    workout_streak_days = 0
-    while streak_cursor in distinct_checkin_dates:
-        workout_streak_days += 1
-        streak_cursor -= timedelta(days=1)
 
-    last_check_in = db.query(func.max(Attendance.check_in_time)).filter(
-        Attendance.user_id == current_user.user_id
-    ).scalar()
+@router.get("/memberDashboardInsights", status_code=status.HTTP_200_OK)
+def get_member_dashboard_insights(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(manager)
+):
+    if not current_user or current_user.role != "member":
+        raise HTTPException(status_code=403, detail="Member role required")
 
-    active_assignment = db.query(TrainerClient).filter(
-        TrainerClient.user_id == current_user.user_id,
-        TrainerClient.is_active.is_(True)
-    ).order_by(
-        TrainerClient.assign_at.desc()
-    ).first()
+    if not current_user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Forbidden: Account is inactive"
+        )
+
+    if getattr(current_user, "email_verified", True) is False:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Email not verified. Please verify your email to continue."
+        )
+
+    today = gym_today()
+    start_30 = today - timedelta(days=30)
+    start_instant, end_instant = days_window(start_30, today, GYM_TIMEZONE)
+    insights = db.execute(MEMBER_DASHBOARD_INSIGHTS_SQL, {
+        "user_id": current_user.user_id,
+        "today": today,
+        "start_30": start_30,
+        "start_instant": start_instant,
+        "end_instant": end_instant,
+    }).one()
+
+    bitmaps = {
+        year: bytes(days)
+        for year, days in zip(insights.bitmap_years or [], insights.bitmap_days or [])
+    }
+    attendance_this_month = count_days_between(bitmaps, today.replace(day=1), today)
+    checkins_last_7_days = count_days_between(bitmaps, today - timedelta(days=6), today)
+    workout_streak_days = current_streak(bitmaps, today)
+    # Counted from the bitmaps like the figures above, so archived days are
+    # included and every figure has the same coverage.
+    total_checkins = sum(attended_days(bitmap) for bitmap in bitmaps.values())
+    avg_session_minutes_30_days = insights.avg_session_minutes_30_days
+    last_check_in = insights.last_check_in
+    if last_check_in is None:
+        last_check_in = _last_check_in_before_window(db, current_user.user_id, bitmaps)
 
     assigned_trainer = None
-    if active_assignment:
-        trainer = db.query(Trainer).filter(
-            Trainer.trainer_id == active_assignment.trainer_id
-        ).first()
-
-        if trainer:
-            assigned_trainer = {
-                "trainer_id": str(trainer.trainer_id),
-                "name": trainer.name,
-                "specializations": trainer.specializations,
-                "experience_years": trainer.experience_years,
-                "short_bio": trainer.short_bio,
-                "certifications": trainer.certifications or [],
-                "assigned_at": active_assignment.assign_at
-            }
+    if insights.trainer_id:
+        assigned_trainer = {
+            "trainer_id": str(insights.trainer_id),
+            "name": insights.trainer_name,
+            "specializations": insights.specializations,
+            "experience_years": insights.experience_years,
+            "short_bio": insights.short_bio,
+            "certifications": insights.certifications or [],
+            "assigned_at": insights.assign_at
+        }
 
     return {
         "summary": {
@@ -732,6 +1231,7 @@ def block_user(user_id: str, db: Session = Depends(get_db), current_user: Admin
     
     user.is_active = not user.is_active
     db.commit()
+    index_member(user)
     return {"message": "Status updated successfully"}
 
 
@@ -746,8 +1246,10 @@ def get_total_users(db:Session=Depends(get_db), current_user: Admin = Depends(ma
             detail="Forbidden: Account is inactive"
         )
     
-    stats = db.execute(
-        text("SELECT count FROM site_statistics WHERE label = 'total_users'")).fetchone()
-    total_users = stats[0] if stats else 0
+    counts = read_counters(db, ["members_total", "members_active", "members_verified"])
 
-    return {"total_users": total_users}
+    return {
+        "total_users": counts["members_total"],
+        "active_users": counts["members_active"],
+        "verified_users": counts["members_verified"]
+    }
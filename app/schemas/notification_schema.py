@@ -1,10 +1,15 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from uuid import UUID
+from datetime import datetime
 
 class NotificationCreate(BaseModel):
     message: str
     recipient_id: str | None = None
     recipient_role: str
+    segment: str | None = None
+    segment_trainer_id: str | None = None
+    inactive_days: int = Field(30, ge=1, le=365)
+    send_at: datetime | None = None
 
 
 
@@ -0,0 +1,41 @@
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+from app.config import GYM_TIMEZONE
+
+
+GYM_ZONE = ZoneInfo(GYM_TIMEZONE)
+
+
+# Attendance tables are range-partitioned on check_in_time, so filters must
+# compare the raw column against concrete instants for the planner to prune.
+def day_window(day: date, tz_name: str = "UTC") -> tuple[datetime, datetime]:
+    zone = ZoneInfo(tz_name)
+    start = datetime.combine(day, time.min, tzinfo=zone)
+    end = datetime.combine(day + timedelta(days=1), time.min, tzinfo=zone)
+    return start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+
+
+def days_window(first_day: date, last_day: date, tz_name: str = "UTC") -> tuple[datetime, datetime]:
+    start, _ = day_window(first_day, tz_name)
+    _, end = day_window(last_day, tz_name)
+    return start, end
+
+
+def gym_today() -> date:
+    return datetime.now(GYM_ZONE).date()
+
+
+def gym_local_date(value: datetime) -> date:
+    return value.astimezone(GYM_ZONE).date()
+
+
+def checkin_day_filters(model, first_day: date, last_day: date | None = None) -> tuple:
+    last_day = last_day or first_day
+    start, end = days_window(first_day, last_day, GYM_TIMEZONE)
+    if first_day == last_day:
+        day_filter = model.check_in_date == first_day
+    else:
+        day_filter = model.check_in_date.between(first_day, last_day)
+    # check_in_date drives the index; the equivalent instant bounds keep
+    # partition pruning on check_in_time.
+    return (day_filter, model.check_in_time >= start, model.check_in_time < end)